@@ -30,59 +30,77 @@ class BaseCorrection(ABC):
         Returns:
             array or Image: corrected image, data type depends on input.
 
+        Raises:
+            TypeError: if the image is neither an array nor an Image.
+
         """
+        # Fast path for arrays - overwrite original array or correct a copy
         if isinstance(image, np.ndarray):
-            if overwrite:
-                # Overwrite original array
-                image = self.correct_array(image)
-                return image
-            else:
-                # Return corrected copy of array
-                return self.correct_array(image.copy())
-
-        elif isinstance(image, darsia.Image):
-            img = image.img if overwrite else image.img.copy()
-
-            if image.series and hasattr(self, "correct_array_series"):
-                # Apply transformation to entrie space time image
-                img = self.correct_array_series(img)
-            elif image.series:
-                # Use external data container for shape altering corrections
-                corrected_slices = []
-
-                # Consider each time slice separately
-                for time_index in range(image.time_num):
-                    if image.scalar:
-                        # Apply transformation to single time slices for scalar data
-                        corrected_slices.append(
-                            self.correct_array(image.img[..., time_index])
-                        )
-                    else:
-                        # Apply transformation to single time slices for vectorial data
-                        corrected_slices.append(
-                            self.correct_array(image.img[..., time_index, :])
-                        )
-
-                # Stack slices together again
-                img = np.stack(corrected_slices, axis=image.space_dim)
+            return self.correct_array(image if overwrite else image.copy())
+
+        if not isinstance(image, darsia.Image):
+            raise TypeError(f"Correction of {type(image)} not supported.")
+
+        if not image.series:
+            # Apply transformation to single image
+            img = self.correct_array(image.img if overwrite else image.img.copy())
+        elif hasattr(self, "correct_array_series"):
+            # Apply transformation to entrie space time image
+            img = self.correct_array_series(
+                image.img if overwrite else image.img.copy()
+            )
+        else:
+            # Apply transformation to each time slice separately
+            img = self._correct_time_slices(image)
+
+        # Apply corrections to metadata
+        meta = image.metadata()
+        meta_update = self.correct_metadata(meta)
+
+        if overwrite:
+            # Overwrite original image
+            image.img = img
+            image.update_metadata(meta_update)
+            return image
+        else:
+            # Return corrected copy of image
+            meta.update(meta_update)
+            return type(image)(img, **meta)
+
+    def _correct_time_slices(self, image: darsia.Image) -> np.ndarray:
+        """Slice-wise correction of space-time images.
 
-            else:
-                # Apply transformation to single image
-                img = self.correct_array(img)
+        Args:
+            image (Image): space-time image
 
-            # Apply corrections to metadata
-            meta_update = self.correct_metadata(image.metadata())
+        Returns:
+            array: corrected space-time array
 
-            if overwrite:
-                # Overwrite original image
-                image.img = img
-                image.update_metadata(meta_update)
-                return image
+        """
+        # Use external data container for shape altering corrections, allocated
+        # based on the first corrected slice and filled slice by slice.
+        img = None
+
+        # Consider each time slice separately
+        for time_index in range(image.time_num):
+            if image.scalar:
+                # Apply transformation to single time slices for scalar data
+                corrected_slice = self.correct_array(image.img[..., time_index])
             else:
-                # Return corrected copy of image
-                meta = image.metadata()
-                meta.update(meta_update)
-                return type(image)(img, **meta)
+                # Apply transformation to single time slices for vectorial data
+                corrected_slice = self.correct_array(image.img[..., time_index, :])
+
+            # Insert slice at the time axis, following the space axes
+            space_shape = corrected_slice.shape[: image.space_dim]
+            range_shape = corrected_slice.shape[image.space_dim :]
+            if img is None:
+                img = np.empty(
+                    (*space_shape, image.time_num, *range_shape),
+                    dtype=corrected_slice.dtype,
+                )
+            img[(slice(None),) * image.space_dim + (time_index,)] = corrected_slice
+
+        return img
 
     @abstractmethod
     def correct_array(
@@ -4,14 +4,34 @@ from pathlib import Path
 from typing import Literal, Union
 
 import matplotlib.pyplot as plt
+import numba
 import numpy as np
-import scipy
-import scipy.optimize
 import skimage
 
 import darsia
 
 
+@numba.njit(parallel=True, fastmath=True, cache=True)
+def _apply_scaling(img: np.ndarray, scaling: np.ndarray, out: np.ndarray) -> None:
+    """Numba kernel for the pixelwise multiplication of a color image.
+
+    Equivalent to np.multiply(img, scaling, out=out, casting="unsafe"), but performed
+    in a single parallel sweep over the rows.
+
+    Args:
+        img (np.ndarray): color image of shape (rows, cols, channels)
+        scaling (np.ndarray): scaling of shape (rows, cols, 1) or (rows, cols, channels)
+        out (np.ndarray): output array of same shape as img
+
+    """
+    rows, cols, channels = img.shape
+    multi_component = scaling.shape[2] > 1
+    for i in numba.prange(rows):
+        for j in range(cols):
+            for c in range(channels):
+                out[i, j, c] = img[i, j, c] * scaling[i, j, c if multi_component else 0]
+
+
 class IlluminationCorrection(darsia.BaseCorrection):
     """Class for illumination correction."""
 
@@ -47,7 +67,6 @@ class IlluminationCorrection(darsia.BaseCorrection):
         # Cache input parameters
         if isinstance(base, darsia.Image):
             base = [base]
-        num_base = len(base)
         num_samples = len(samples)
 
         # Convert image to requested format
@@ -60,10 +79,11 @@ class IlluminationCorrection(darsia.BaseCorrection):
                 for base in base
             ]
         elif self.colorspace in ["lab-scalar"]:
+            # Restrict to the relevant channel prior to the type conversion
             images = [
                 skimage.img_as_float(
-                    base.to_trichromatic("LAB", return_image=True).img
-                )[..., 0]
+                    base.to_trichromatic("LAB", return_image=True).img[..., 0]
+                )
                 for base in base
             ]
         elif self.colorspace in ["hsl"]:
@@ -72,10 +92,11 @@ class IlluminationCorrection(darsia.BaseCorrection):
                 for base in base
             ]
         elif self.colorspace in ["hsl-scalar"]:
+            # Restrict to the relevant channel prior to the type conversion
             images = [
                 skimage.img_as_float(
-                    base.to_trichromatic("HLS", return_image=True).img
-                )[..., 1]
+                    base.to_trichromatic("HLS", return_image=True).img[..., 1]
+                )
                 for base in base
             ]
         elif self.colorspace == "gray":
@@ -99,66 +120,34 @@ class IlluminationCorrection(darsia.BaseCorrection):
             )
 
             # Pick reference color and cache results
-            reference_colors.append(np.outer(np.ones(num_samples), colors[ref_sample]))
+            reference_colors.append(colors[ref_sample])
             characteristic_colors.append(colors)
 
         # Determine local scaling values
         method_is_trichromatic = self.colorspace in ["rgb", "lab", "hsl"]
         color_components = 3 if method_is_trichromatic else 1
 
-        def objective_function(scaling):
-            """Objective function for least-squares problem."""
-            scaling = (np.reshape(scaling, (num_samples, color_components)),)
-            stacked_scaling = np.vstack(num_base * [scaling])
-            stacked_characteristic_colors = np.vstack(characteristic_colors)
-            stacked_reference_colors = np.vstack(reference_colors)
-            return np.sum(
-                (
-                    np.multiply(stacked_scaling, stacked_characteristic_colors)
-                    - stacked_reference_colors
-                )
-                ** 2
-            )
-
-        # Solve least-squares problem
-        opt_result = scipy.optimize.minimize(
-            objective_function,
-            np.ones(num_samples * color_components),
-            method="Powell",
-            tol=1e-6,
-            options={"maxiter": 1000, "disp": True},
-        )
-
-        scaling = np.reshape(opt_result.x, (num_samples, color_components))
+        # Solve least-squares problem - it decouples for each sample (and color
+        # component, if trichromatic) with minimizer sum(c * r) / sum(c * c), where the
+        # sums run over all base images (and color components, if scalar).
+        stacked_characteristic_colors = np.array(characteristic_colors)
+        # The reference color is common to all samples - broadcast instead of tiling
+        stacked_reference_colors = np.array(reference_colors)[:, np.newaxis, :]
+        axes = (0,) if method_is_trichromatic else (0, 2)
+        scaling = np.sum(
+            stacked_characteristic_colors * stacked_reference_colors, axis=axes
+        ) / np.sum(stacked_characteristic_colors**2, axis=axes)
+        scaling = np.reshape(scaling, (num_samples, color_components))
 
         # Interpolate scaling to the full coordinate system
-        # Implicitly assume that all base images have the same coordinate system
-        x_coords = np.vstack(
-            num_base
-            * [
-                np.array(
-                    [
-                        base[0].coordinatesystem.coordinate(
-                            darsia.make_voxel([sl[0].start, sl[1].start])
-                        )[0]
-                        for sl in samples
-                    ]
-                )
-            ]
-        )
-        y_coords = np.vstack(
-            num_base
-            * [
-                np.array(
-                    [
-                        base[0].coordinatesystem.coordinate(
-                            darsia.make_voxel([sl[0].start, sl[1].start])
-                        )[1]
-                        for sl in samples
-                    ]
-                )
-            ]
+        # Implicitly assume that all base images have the same coordinate system.
+        # The scaling is shared by all base images, hence the sample coordinates are
+        # required only once - and are determined for all samples at once.
+        coords = base[0].coordinatesystem.coordinate(
+            darsia.make_voxel([[sl[0].start, sl[1].start] for sl in samples])
         )
+        x_coords = coords[:, 0]
+        y_coords = coords[:, 1]
 
         # Interpolate the determined scaling and cache it - only the L-component of the
         # LAB-based analysis for RGB-based correction.
@@ -190,19 +179,15 @@ class IlluminationCorrection(darsia.BaseCorrection):
                     method=interpolation,
                 )
             ]
+        self._stack_scaling()
 
         if show_plot:
             # Plot the determined scaling
             fig, ax = plt.subplots()
-            ax.imshow(self.local_scaling[0].img)
+            im = ax.imshow(self.local_scaling[0].img)
             ax.set_title("Scaling")
             # Add color bar
-            fig.colorbar(
-                ax.imshow(self.local_scaling[0].img),
-                ax=ax,
-                orientation="vertical",
-                fraction=0.05,
-            )
+            fig.colorbar(im, ax=ax, orientation="vertical", fraction=0.05)
             plt.show()
 
     def correct_array(self, img: np.ndarray) -> np.ndarray:
@@ -212,22 +197,76 @@ class IlluminationCorrection(darsia.BaseCorrection):
             img (np.ndarray): input image
 
         Returns:
-            np.ndarray: corrected image
+            np.ndarray: corrected image; the input itself if the scaling is trivial
+
+        """
+        return self._rescale(img, self._scaling_stack)
+
+    def correct_array_series(self, img: np.ndarray) -> np.ndarray:
+        """Rescale a space-time array using local WB.
+
+        The scaling is constant in time and thus broadcasted over all time slices at
+        once, avoiding a loop over the single slices.
+
+        Args:
+            img (np.ndarray): input space-time image, with time as second last axis
+
+        Returns:
+            np.ndarray: corrected space-time image
+
+        """
+        return self._rescale(img, self._scaling_stack[..., np.newaxis, :])
+
+    def _rescale(self, img: np.ndarray, scaling: np.ndarray) -> np.ndarray:
+        """Multiply color image with broadcastable scaling.
+
+        Args:
+            img (np.ndarray): input (space-time) image
+            scaling (np.ndarray): scaling compatible with img through broadcasting
+
+        Returns:
+            np.ndarray: rescaled image; the input itself if the scaling is trivial
 
         """
-        img_wb = img.copy()
         if img.shape[-1] == 1:
             raise NotImplementedError("Only color images are supported.")
+        assert img.shape[-1] == 3
+        if self._identity:
+            return img
+        # Write directly into the output array (every entry is overwritten, hence no
+        # copy required).
+        img_wb = np.empty_like(img)
+        if img.ndim == 3 and scaling.ndim == 3:
+            # Single parallel sweep over the pixels of a color image
+            _apply_scaling(img, scaling, img_wb)
         else:
-            assert img.shape[-1] == 3
-            for i in range(3):
-                # NOTE: Only the "rgb" methodology employs a multi-component scaling.
-                img_wb[..., i] = np.multiply(
-                    img_wb[..., i],
-                    self.local_scaling[i if self.colorspace == "rgb" else 0].img,
-                )
+            # Single broadcast over all color channels and time slices
+            np.multiply(img, scaling, out=img_wb, casting="unsafe")
         return img_wb
 
+    def _stack_scaling(self) -> None:
+        """Cache the local scaling as single array broadcastable to color images.
+
+        The scaling is stored in single precision, which is sufficient for the smooth
+        scaling and does not promote float32 images, while halving the memory traffic.
+
+        NOTE: Only the "rgb" methodology employs a multi-component scaling.
+
+        """
+        if self.colorspace == "rgb":
+            self._scaling_stack = np.stack(
+                [scaling.img for scaling in self.local_scaling],
+                axis=-1,
+                dtype=np.float32,
+            )
+        else:
+            self._scaling_stack = (
+                self.local_scaling[0].img[..., np.newaxis].astype(np.float32)
+            )
+
+        # Identify (close to) trivial scaling, allowing to skip the correction
+        self._identity = bool(np.max(np.abs(self._scaling_stack - 1.0)) < 1e-4)
+
     def save(self, path: Path) -> None:
         """Save the illumination correction to a file.
 
@@ -238,13 +277,14 @@ class IlluminationCorrection(darsia.BaseCorrection):
         # Make sure the parent directory exists
         path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Store color space and local scaling images as npz files
-        np.savez(
+        # Store color space and local scaling images as plain (compressed) arrays,
+        # together with the geometric information required to rebuild the images.
+        np.savez_compressed(
             path,
-            config={
-                "colorspace": self.colorspace,
-                "local_scaling": self.local_scaling,
-            },
+            colorspace=np.array(self.colorspace),
+            local_scaling=np.stack([scaling.img for scaling in self.local_scaling]),
+            dimensions=np.array(self.local_scaling[0].dimensions, dtype=float),
+            origin=np.array(self.local_scaling[0].origin, dtype=float),
         )
         print(f"Illumination correction saved to {path}.")
 
@@ -260,8 +300,24 @@ class IlluminationCorrection(darsia.BaseCorrection):
             raise FileNotFoundError(f"File {path} not found.")
 
         # Load color space and local scaling images from npz file
-        data = np.load(path, allow_pickle=True)["config"].item()
-        if "colorspace" not in data or "local_scaling" not in data:
+        data = np.load(path)
+        if "config" in data:
+            # Legacy format, storing the images as pickled objects
+            config = np.load(path, allow_pickle=True)["config"].item()
+            if "colorspace" not in config or "local_scaling" not in config:
+                raise ValueError("Invalid file format.")
+            self.colorspace = config["colorspace"]
+            self.local_scaling = config["local_scaling"]
+        elif "colorspace" in data and "local_scaling" in data:
+            self.colorspace = str(data["colorspace"])
+            self.local_scaling = [
+                darsia.ScalarImage(
+                    scaling,
+                    dimensions=data["dimensions"].tolist(),
+                    origin=data["origin"],
+                )
+                for scaling in data["local_scaling"]
+            ]
+        else:
             raise ValueError("Invalid file format.")
-        self.colorspace = data["colorspace"]
-        self.local_scaling = data["local_scaling"]
+        self._stack_scaling()
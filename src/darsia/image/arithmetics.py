@@ -12,6 +12,24 @@ import numpy as np
 import darsia
 
 
+def _multiply(array: np.ndarray, factor: Union[float, np.ndarray]) -> np.ndarray:
+    """Multiply an array with a factor, in-place if no type promotion is required.
+
+    Args:
+        array (np.ndarray): array to be multiplied.
+        factor (float or np.ndarray): factor, broadcastable to the array.
+
+    Returns:
+        np.ndarray: product, sharing memory with the input array if possible.
+
+    """
+    if np.result_type(array, factor) == array.dtype:
+        array *= factor
+        return array
+    else:
+        return np.multiply(array, factor)
+
+
 def weight(img: darsia.Image, weight: Union[float, int, darsia.Image]) -> darsia.Image:
     """Scalar or element-wise weight of images.
 
@@ -51,20 +69,15 @@ def weight(img: darsia.Image, weight: Union[float, int, darsia.Image]) -> darsia
             else:
                 raise NotImplementedError
 
-        # Rescale
-        weighted_img.img = np.multiply(weighted_img.img, weight.img)
+        # Rescale - in-place unless the dtype needs to be promoted
+        weighted_img.img = _multiply(weighted_img.img, weight.img)
 
     elif isinstance(weight, np.ndarray) and np.allclose(
         weight.shape, weighted_img.shape[weighted_img.space_dim :]
     ):
         # Spatially constant weight, but differing for time and data indices.
-        shape = weighted_img.img.shape
-        weighted_img.img = np.multiply(
-            weighted_img.img,
-            np.outer(
-                np.ones(weighted_img.coordinatesystem.shape, dtype=float), weight
-            ).reshape(shape),
-        )
+        # Broadcasting over the trailing axes avoids assembling a full-size weight.
+        weighted_img.img = _multiply(weighted_img.img, weight)
 
     else:
         raise ValueError
@@ -122,22 +135,23 @@ def superpose(images: list[darsia.Image]) -> darsia.Image:
 
     # ! ---- Determine the meta data
 
-    # Determine the common origin and opposite corner (as Cartesian coordinates)
-    collection_origin = np.vstack(tuple(img.origin for img in images))
-    collection_opposite_corner = np.vstack(tuple(img.opposite_corner for img in images))
-    origin = []
-    opposite_corner = []
-    for i in range(space_dim):
-        # In case the axis follows a different orientation than
-        # the corresponding cartesian axis, the maximal coordinate
-        # has to be chosen (e.g., y-axis in 2d), minimal otherwise.
-        _, revert = darsia.interpret_indexing("xyz"[i], indexing)
-        if revert:
-            origin.append(np.max(collection_origin[:, i]))
-            opposite_corner.append(np.min(collection_opposite_corner[:, i]))
-        else:
-            origin.append(np.min(collection_origin[:, i]))
-            opposite_corner.append(np.max(collection_opposite_corner[:, i]))
+    # Determine the common origin and opposite corner (as Cartesian coordinates).
+    # In case the axis follows a different orientation than the corresponding
+    # cartesian axis, the maximal coordinate has to be chosen (e.g., y-axis in 2d),
+    # minimal otherwise.
+    collection_origin = np.array([img.origin for img in images])
+    collection_opposite_corner = np.array([img.opposite_corner for img in images])
+    revert = np.array(
+        [darsia.interpret_indexing("xyz"[i], indexing)[1] for i in range(space_dim)]
+    )
+    origin = np.where(
+        revert, np.max(collection_origin, axis=0), np.min(collection_origin, axis=0)
+    )
+    opposite_corner = np.where(
+        revert,
+        np.min(collection_opposite_corner, axis=0),
+        np.max(collection_opposite_corner, axis=0),
+    )
 
     # Determine resulting dimensions in matrix indexing
     cartesian_dimensions = [
@@ -162,7 +176,7 @@ def superpose(images: list[darsia.Image]) -> darsia.Image:
     # ! ---- Superpose the data
 
     # Find the correct shape and initialize image, and coordinatesystem
-    collection_voxel_size = np.vstack(tuple(img.voxel_size for img in images))
+    collection_voxel_size = np.array([img.voxel_size for img in images])
     voxel_size = np.min(collection_voxel_size, axis=0)
     space_shape = tuple(
         np.ceil(dimensions[i] / voxel_size[i]).astype(int) for i in range(space_dim)
@@ -178,6 +192,11 @@ def superpose(images: list[darsia.Image]) -> darsia.Image:
 
     # Successively add images to the right voxels - essentially use resample
     # Approach from imread_from_vtu, but now voxel grids are provided.
+    # Warp each (time slice of each) image into a common buffer and add it in-place.
+    # Floating point data is warped in its own precision, other data in float32.
+    warped_array = np.empty(
+        space_shape, dtype=np.float64 if image.img.dtype == np.float64 else np.float32
+    )
     for img in images:
 
         # Get origin and opposite corner for img
@@ -197,37 +216,34 @@ def superpose(images: list[darsia.Image]) -> darsia.Image:
             ]
         )
 
+        # Use corners as pts_src
+        rows, cols = img.img.shape[:2]
+        pts_src = darsia.make_voxel(
+            [
+                [0, 0],
+                [rows, 0],
+                [rows, cols],
+                [0, cols],
+            ]
+        )
+
         # Visit each time slab separately
         for time_counter in range(time_num):
 
-            # Get array and shape (for
+            # Get array and warp it into the buffer
             array = img.img[..., time_counter] if series else img.img
-            rows, cols = array.shape
-
-            # Use corners as pts_src
-            pts_src = darsia.make_voxel(
-                [
-                    [0, 0],
-                    [rows, 0],
-                    [rows, cols],
-                    [0, cols],
-                ]
-            )
-
-            # Warp array
-            warped_array = darsia.extract_quadrilateral_ROI(
+            darsia.extract_quadrilateral_ROI(
                 img_src=array,
                 pts_src=pts_src,
                 pts_dst=pts_dst,
                 interpolation="inter_area",
                 shape=space_shape,
+                out=warped_array,
             )
 
             # Add warped_array to image.img
-            if series:
-                image.img[..., time_counter] += warped_array
-            else:
-                image.img += warped_array
+            target = image.img[..., time_counter] if series else image.img
+            target += warped_array.astype(target.dtype, copy=False)
 
     return image
 
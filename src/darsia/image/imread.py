@@ -10,17 +10,20 @@ are supported:
 
 from __future__ import annotations
 
-from datetime import datetime
-from operator import itemgetter
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from io import BytesIO
 from pathlib import Path
-from subprocess import check_output
 from typing import Optional, Union
 
 import cv2
 import numpy as np
 import pydicom
+import scipy.ndimage
 from PIL import Image as PIL_Image
-from scipy.interpolate import NearestNDInterpolator
 
 import darsia
 
@@ -49,12 +52,9 @@ def imread(path: Union[str, Path, list[str], list[Path]], **kwargs) -> darsia.Im
 
     # Extract content of folder if folder provided.
     if isinstance(path, Path) and path.is_dir():
-        path = sorted(list(path.glob("*")))
+        path = _list_files([path], kwargs.get("suffix"))
     elif isinstance(path, list) and all([p.is_dir() for p in path]):
-        tmp_path = []
-        for p in path:
-            tmp_path = tmp_path + list(p.glob("*"))
-        path = sorted(tmp_path)
+        path = _list_files(path, kwargs.get("suffix"))
 
     # Check if files exist
     if isinstance(path, list):
@@ -90,15 +90,112 @@ def imread(path: Union[str, Path, list[str], list[Path]], **kwargs) -> darsia.Im
         raise NotImplementedError(f"Filetype {suffix} not supported.")
 
 
+def _list_files(folders: list[Path], suffix: Optional[str] = None) -> list[Path]:
+    """Sorted list of files in folders, possibly restricted to a file type.
+
+    Args:
+        folders (list of Path): folders to search through.
+        suffix (str, optional): file type to filter for (case insensitive).
+
+    Returns:
+        list of Path: sorted paths to files.
+
+    """
+    if suffix is not None:
+        suffix = str(suffix).lower()
+    files = []
+    for folder in folders:
+        with os.scandir(folder) as entries:
+            files.extend(
+                entry.path
+                for entry in entries
+                if entry.is_file()
+                and (suffix is None or entry.name.lower().endswith(suffix))
+            )
+    return sorted(Path(f) for f in files)
+
+
+def _cache_path(path: Path, cache_dir: Path) -> Path:
+    """Path to the cached decoded array of an image file.
+
+    The cache key is based on the resolved path, the time of the last modification,
+    and the size of the image file, such that modified files are decoded again.
+
+    Args:
+        path (Path): path to image file.
+        cache_dir (Path): folder of the cache.
+
+    Returns:
+        Path: path to npy file.
+
+    """
+    stat = path.stat()
+    key = hashlib.blake2b(
+        f"{path.resolve()}:{stat.st_mtime_ns}:{stat.st_size}".encode(),
+        digest_size=8,
+    ).hexdigest()
+    return Path(cache_dir) / f"{key}.npy"
+
+
+def _load_cached_array(path: Path, cache_dir: Optional[Path]) -> Optional[np.ndarray]:
+    """Fetch the decoded array of an image file from the cache, if available.
+
+    Args:
+        path (Path): path to image file.
+        cache_dir (Path, optional): folder of the cache; no caching if None.
+
+    Returns:
+        np.ndarray, optional: memory-mapped (copy-on-write) decoded array.
+
+    """
+    if cache_dir is None:
+        return None
+    cache_path = _cache_path(path, cache_dir)
+    if not cache_path.exists():
+        return None
+    return np.load(cache_path, mmap_mode="c", allow_pickle=False)
+
+
+def _save_cached_array(
+    path: Path, cache_dir: Optional[Path], array: np.ndarray
+) -> None:
+    """Store the decoded array of an image file in the cache.
+
+    The array is written to a temporary file first, such that concurrent reads never
+    access incomplete files. The temporary file is removed if writing fails.
+
+    Args:
+        path (Path): path to image file.
+        cache_dir (Path, optional): folder of the cache; no caching if None.
+        array (np.ndarray): decoded array.
+
+    """
+    if cache_dir is None:
+        return
+    cache_path = _cache_path(path, cache_dir)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = tempfile.NamedTemporaryFile(
+        dir=cache_path.parent, suffix=".npy", delete=False
+    )
+    try:
+        with tmp_file:
+            np.save(tmp_file, array)
+        os.replace(tmp_file.name, cache_path)
+    except Exception:
+        Path(tmp_file.name).unlink(missing_ok=True)
+        raise
+
+
 def imread_from_bytes(
-    data: bytes,
+    data: Union[bytes, memoryview, np.ndarray],
     transformations: Optional[list] = None,
     **kwargs,
 ) -> darsia.Image:
     """Initialization of Image by reading from byte string.
 
     Args:
-        data (bytes): byte string of image.
+        data (bytes, memoryview, or array): byte string of image; uint8 arrays
+            are decoded without any intermediate conversion.
         transformations (list of callables): transformations.
         kwargs: keyword arguments.
 
@@ -106,12 +203,15 @@ def imread_from_bytes(
         darsia.Image: image; scalar or optical, depending on the number of channels.
 
     """
+    # Wrap byte string as array (without copy) unless provided as array.
+    buffer = data if isinstance(data, np.ndarray) else np.frombuffer(data, np.uint8)
+
     # Read image from byte string, convert to RGB
-    array = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+    array = cv2.imdecode(buffer, cv2.IMREAD_UNCHANGED)
 
     if len(array.shape) == 3 and array.shape[-1] == 3:
-        # If multichromatic, convert to RGB (Assume BGR format from cv2)
-        array = cv2.cvtColor(array, cv2.COLOR_BGR2RGB)
+        # If multichromatic, convert to RGB (Assume BGR format from cv2) - in-place.
+        cv2.cvtColor(array, cv2.COLOR_BGR2RGB, dst=array)
         return darsia.OpticalImage(img=array, transformations=transformations, **kwargs)
     elif len(array.shape) == 2:
         return darsia.ScalarImage(img=array, transformations=transformations, **kwargs)
@@ -127,12 +227,17 @@ def imread_from_bytes(
 
 
 def imread_from_numpy(
-    path: Union[Path, list[Path]], **kwargs
+    path: Union[Path, list[Path]], copy_on_load: bool = False, **kwargs
 ) -> Union[darsia.Image, list[darsia.Image]]:
     """Converter from npy format to darsia.Image.
 
+    The array is memory-mapped in copy-on-write mode, i.e., data is only read from
+    file when accessed, and modifications of the image do not affect the file.
+
     Args:
         path (Path or list of Path): path(s) to npy files.
+        copy_on_load (bool): flag controlling whether the array is fully loaded into
+            memory at once; default is False.
         keyword arguments:
 
 
@@ -140,7 +245,9 @@ def imread_from_numpy(
     if isinstance(path, list):
         raise NotImplementedError
 
-    array = np.load(path, allow_pickle=True)
+    array = np.load(path, mmap_mode="c", allow_pickle=False)
+    if copy_on_load:
+        array = np.array(array)
     image = darsia.Image(array, **kwargs)
     return image
 
@@ -152,9 +259,11 @@ def imread_from_npz(path: Union[Path, list[Path]]) -> darsia.Image:
         path (Path or list of Path): path(s) to npz files.
 
     """
-    npzdata = np.load(path, allow_pickle=True)
-    array = npzdata["array"]
-    metadata = npzdata["metadata"].item()
+    # Only the metadata requires pickling.
+    with np.load(path) as npzdata:
+        array = npzdata["array"]
+    with np.load(path, allow_pickle=True) as npzdata:
+        metadata = npzdata["metadata"].item()
     image = darsia.Image(array, **metadata)
     return image
 
@@ -166,6 +275,8 @@ def imread_from_optical(
     path: Union[Path, list[Path]],
     time: Optional[Union[int, float, list]] = None,
     transformations: Optional[list] = None,
+    dtype=float,
+    cache_dir: Optional[Path] = None,
     **kwargs,
 ) -> Union[darsia.OpticalImage, list[darsia.OpticalImage]]:
     """Reading functionality from jpg, png, tif format to optical images.
@@ -175,6 +286,10 @@ def imread_from_optical(
         time (scalar or list of such): user-specified physical times;
             automatically detected from metadata if 'None'.
         transformations (list of callables): transformations for 2d images.
+        dtype: floating point data type of the image, e.g., np.float32 to halve the
+            memory footprint; default is float.
+        cache_dir (Path, optional): folder to cache decoded images in, allowing to
+            skip decoding when reading the same images again; no caching if None.
         keyword arguments:
             date (datetime): custom datetime; otherwise read from metadata
             color_space (str): custom color space; RGB is assumed otherwise
@@ -189,7 +304,7 @@ def imread_from_optical(
 
     if isinstance(path, Path):
         # Read single image incl. date from metadata of the image
-        array, date = _read_single_optical_image(path)
+        array, date = _read_single_optical_image(path, cache_dir)
 
         # Use the date only if not provided separately
         if "date" not in kwargs:
@@ -206,19 +321,32 @@ def imread_from_optical(
             time=time,
             transformations=transformations,
             **kwargs,
-        ).img_as(float)
+        ).img_as(dtype)
 
         return image
 
     elif isinstance(path, list):
         # Collection of images
 
-        # Read from file
-        data = [_read_single_optical_image(p) for p in path]
-
-        # Create a space-time optical image through stacking along the time axis
-        space_time_array = np.stack([d[0] for d in data], axis=2)
-        dates = [d[1] for d in data]
+        # Read first image to allocate the space-time array, with time as third axis
+        array, date = _read_single_optical_image(path[0], cache_dir)
+        space_time_array = np.empty(
+            (*array.shape[:2], len(path), *array.shape[2:]), dtype=array.dtype
+        )
+        space_time_array[:, :, 0] = array
+
+        def _read_into_time_slice(time_index: int) -> Optional[datetime]:
+            """Read image from file and store directly in the space-time array."""
+            array, date = _read_single_optical_image(path[time_index], cache_dir)
+            space_time_array[:, :, time_index] = array
+            return date
+
+        # Read remaining images - decoding releases the GIL, hence use concurrent
+        # threads.
+        with ThreadPoolExecutor() as executor:
+            dates = [date] + list(
+                executor.map(_read_into_time_slice, range(1, len(path)))
+            )
 
         # Fix metadata
         kwargs["series"] = True
@@ -231,63 +359,93 @@ def imread_from_optical(
             time=time,
             transformations=transformations,
             **kwargs,
-        ).img_as(float)
+        ).img_as(dtype)
         return image
 
     else:
         raise NotImplementedError
 
 
-def _read_single_optical_image(path: Path) -> tuple[np.ndarray, Optional[datetime]]:
+def _read_single_optical_image(
+    path: Path, cache_dir: Optional[Path] = None
+) -> tuple[np.ndarray, Optional[datetime]]:
     """Utility function for setting up a single optical image.
 
     Args:
         path (Path): path to single optical image.
+        cache_dir (Path, optional): folder of the cache of decoded images.
 
     Returns:
         np.ndarray: data array in RGB format
         date (optional): date
 
     """
-    # Read image and convert to RGB and float ([0,1])
-    array = cv2.cvtColor(cv2.imread(str(path), cv2.IMREAD_UNCHANGED), cv2.COLOR_BGR2RGB)
-
-    # Prefered: Read time from exif metafile.
-    pil_img = PIL_Image.open(path)
-    exif = pil_img.getexif()
-    if exif.get(306) is not None:
-        # Hardcoded way of retrieving the datetime of "2022:08:29 23:10:27"
-        date = datetime.strptime(exif.get(306), "%Y:%m:%d %H:%M:%S")
+    # Lists of paths may also contain plain strings.
+    path = Path(path)
+
+    # Fetch decoded image from cache, if available - only the metadata is read.
+    array = _load_cached_array(path, cache_dir)
+    if array is not None:
+        return array, _read_exif_date(path)
+
+    # Read the file only once - its content is used for decoding and metadata.
+    buffer = np.fromfile(path, dtype=np.uint8)
+
+    # Decode image directly in RGB format, keeping the bit depth and orientation as
+    # stored. NOTE: OpenCV does not decode 16-bit TIFF images correctly in RGB mode,
+    # such that these are decoded in BGR format and converted.
+    if path.suffix.lower() in [".tif", ".tiff"]:
+        array = cv2.cvtColor(
+            cv2.imdecode(buffer, cv2.IMREAD_UNCHANGED), cv2.COLOR_BGR2RGB
+        )
     else:
-        date = None
+        array = cv2.imdecode(
+            buffer,
+            cv2.IMREAD_COLOR_RGB | cv2.IMREAD_ANYDEPTH | cv2.IMREAD_IGNORE_ORIENTATION,
+        )
 
-    # Alternatively, use terminal output.
-    # Credit to: https://stackoverflow.com/questions/27929025/...
-    # ...exif-python-pil-return-empty-dictionary
-    if date is None:
-        try:
-            # The following code requires the ImageMagick package. If not installed,
-            # the following line will raise a NotFileFoundError.
-            output = check_output(f"identify -verbose {str(path)}".split())
-            meta = {}
-            for line in output.splitlines()[:-1]:
-                spl = line.decode().split(":", 1)
-                k, v = spl
-                meta[k.lstrip()] = v.strip()
-
-            date_with_info = meta["date"]
-            spl = date_with_info.split(":", 1)
-            # Hardcoded way of retrieving the datetime of "2022-10-12T11:02:40+02:00"
-            date = datetime.strptime(spl[1][1:], "%Y-%m-%dT%H:%M:%S%z")
-        except FileNotFoundError:
-            print(
-                "Warning: No exif metafile found. "
-                "Please install ImageMagick to read metadata from terminal."
-            )
+    # Read time from exif metadata.
+    date = _read_exif_date(buffer)
+
+    _save_cached_array(path, cache_dir, array)
 
     return array, date
 
 
+def _read_exif_date(buffer: Union[np.ndarray, Path]) -> Optional[datetime]:
+    """Utility function for reading the date from exif metadata of an encoded image.
+
+    Only the header of the file is parsed; no image data is decoded.
+
+    Args:
+        buffer (np.ndarray or Path): encoded image file content, or path to the file.
+
+    Returns:
+        date (optional): date, if available
+
+    """
+    if isinstance(buffer, np.ndarray):
+        buffer = BytesIO(buffer)
+    with PIL_Image.open(buffer) as pil_img:
+        # PNG images store exif data in a dedicated chunk, and Pillow decodes the
+        # entire image when searching for it. Only consider chunks found in the header.
+        if pil_img.format == "PNG" and "exif" not in pil_img.info:
+            return None
+        exif = pil_img.getexif()
+
+        # Use the date of the last modification (DateTime), and alternatively the
+        # date of the original capture (DateTimeOriginal) stored in the Exif IFD.
+        # NOTE: For TIFF images, the Exif IFD is read from the open file.
+        date = exif.get(0x0132)
+        if date is None:
+            date = exif.get_ifd(0x8769).get(0x9003)
+
+    if date is not None:
+        # Hardcoded way of retrieving the datetime of "2022:08:29 23:10:27"
+        return datetime.strptime(date, "%Y:%m:%d %H:%M:%S")
+    return None
+
+
 # ! ---- DICOM images
 
 
@@ -295,6 +453,7 @@ def imread_from_dicom(
     path: Union[Path, list[Path]],
     dim: int = 2,
     transformations: Optional[list] = None,
+    cache_dir: Optional[Path] = None,
     **kwargs,
 ) -> Union[darsia.ScalarImage, list[darsia.ScalarImage]]:
     """Initialization of Image by reading from DICOM format.
@@ -313,6 +472,8 @@ def imread_from_dicom(
         path (Path, or list of such): path to dicom stacks
         dim (int): spatial dimensionality of the images.
         transformations (list of callables): transformations.
+        cache_dir (Path, optional): folder to cache decoded pixel data in, allowing
+            to skip decoding when reading the same images again; no caching if None.
         kwargs: keyword arguments.
 
 
@@ -353,53 +514,54 @@ def imread_from_dicom(
     if not isinstance(path, list):
         path = [path]
 
+    # Header tags required to sort the dicom samples - pixel data is not needed
+    header_tags = [
+        tag_position,
+        tag_rows,
+        tag_cols,
+        tag_pixel_size,
+        tag_slice_thickness,
+        tag_acquisition_date,
+        tag_acquisition_time,
+        tag_rescale_intercept,
+        tag_rescale_slope,
+    ]
+
     # Initialize arrays for DICOM data
-    pixel_data = []  # actual signal
     slice_positions = []  # the position in page direction, i.e., of each slice.
     num_rows = []  # image size in row/z direction.
     num_cols = []  # image size in col/y direction.
-    # num_slices = []  # image size in page/x direction # TODO rm
     acq_times = []  # acquisition time of samples
     acq_date_time_tuples = []  # acquision (date, time) of samples
+    intercepts = []  # rescale intercept of samples
+    slopes = []  # rescale slope of samples
 
     # Consider each dicom file by itself (each file is a sample and has to
-    # be sorted into the larger picture.
+    # be sorted into the larger picture. Only the header is read at this point.
     for p in path:
-        # Read the dicom sample
-        dataset = pydicom.dcmread(p)
-
-        # Extract the actual signal.
-        signal = dataset.pixel_array
+        # Read the header of the dicom sample
+        dataset = pydicom.dcmread(p, stop_before_pixels=True, specific_tags=header_tags)
 
-        # Rescale
-        intercept = dataset[tag_rescale_intercept].value
-        slope = dataset[tag_rescale_slope].value
-        rescaled_signal = intercept + slope * signal
+        # Fetch rescale parameters
+        intercepts.append(dataset[tag_rescale_intercept].value)
+        slopes.append(dataset[tag_rescale_slope].value)
 
         # NOTE: In practice, corrections used to reconstruct the DICOM images (decay,
         # dead time) do not need to be the same for all images. This is not taken care
         # of in DarSIA at the moment.
 
-        # Store
-        pixel_data.append(rescaled_signal)
-
         # Extract position for each slice.
         slice_positions.append(np.array(dataset[tag_position].value))
 
         # Extract number of datapoints in each direction.
         num_rows.append(dataset[tag_rows].value)
         num_cols.append(dataset[tag_cols].value)
-        # TODO rm
-        # if tag_number_slices in dataset:  # may only exist for 2d images
-        #    num_slices.append(dataset[tag_number_slices].value)
-        # else:
-        #    num_slices.append(1)
 
         # Extract acquisition time for each slice
-        acq_date_time_tuples.append(
-            dataset[tag_acquisition_date].value + dataset[tag_acquisition_time].value
-        )
-        acq_times.append(dataset[tag_acquisition_time].value)
+        acq_date = dataset[tag_acquisition_date].value
+        acq_time = dataset[tag_acquisition_time].value
+        acq_date_time_tuples.append(acq_date + acq_time)
+        acq_times.append(acq_time)
 
         # Extract pixel size - assume constant for all files - and assume info in mm
         conversion_mm_to_m = 10 ** (-3)
@@ -413,58 +575,74 @@ def imread_from_dicom(
     # Assume constant image size.
     assert all([num_rows[i] == num_rows[0] for i in range(len(num_rows))])
     assert all([num_cols[i] == num_cols[0] for i in range(len(num_cols))])
-    # TODO rm
-    # assert all([num_slices[i] == num_slices[0] for i in range(len(num_slices))])
 
     # ! ---- 2. Step: Sort input wrt datetime
 
     # Convert data to numpy arrays.
-    voxel_data = np.stack(pixel_data, axis=2)  # comes in standard matrix indexing
     slice_positions = np.array(slice_positions)  # only used to sort slices.
     acq_times = np.array(acq_times)  # used to distinguish between images.
 
     # Convert date time strings to datetime format. Expect a data format for the input
     # as ('20210222133538.000'), where the first entry represent the date Feb 22, 2021,
     # and the second entry represents the time 13 hours, 35 minutes, and 38 seconds.
-    # Sort the list of datetimes, starting with the earliest datetime.
+    # Fractional seconds are kept. Sort the list of datetimes, starting with the
+    # earliest datetime.
     def datetime_conversion(date_time: str) -> datetime:
-        return datetime.strptime(date_time[:14], "%Y%m%d%H%M%S")
-
-    # Convert times to different formats, forcing uniqueness and search possibilties.
-    acq_date_time_tuples = np.array(acq_date_time_tuples, dtype=object)
-    unique_acq_dates = list(set(acq_date_time_tuples))
-    times_indices = [
-        (datetime_conversion(u), i) for i, u in enumerate(unique_acq_dates)
-    ]
-    sorted_times_indices = sorted(times_indices, key=itemgetter(0))
-    sorted_times = [t for t, _ in sorted_times_indices]
-    sorted_indices = [i for _, i in sorted_times_indices]
+        date = datetime.strptime(date_time[:14], "%Y%m%d%H%M%S")
+        if date_time[14:15] == ".":
+            date += timedelta(seconds=float(date_time[14:]))
+        return date
+
+    # Group samples into time frames based on the full date time strings, keeping
+    # sub-second precision. With fixed-width dates and times, the lexicographic order
+    # of the strings is chronological.
+    unique_date_times, time_indices = np.unique(
+        np.array(acq_date_time_tuples, dtype=str), return_inverse=True
+    )
+    sorted_times = [datetime_conversion(u) for u in unique_date_times]
 
     # Determine varying axis in slice positions (assume same for all slices)
-    varying_axis = int(np.argwhere(np.diff(slice_positions, axis=0)[0] != 0))
-    num_slices = len(list(set(slice_positions[:, varying_axis])))
+    varying_axis = int(np.argmax(np.ptp(slice_positions, axis=0)))
+    num_slices = np.unique(slice_positions[:, varying_axis]).size
+
+    # Sort samples wrt datetime first, and slice position second (stored as third
+    # component). Within each time frame, the slice index is then the offset to the
+    # first sample of the time frame.
+    order = np.lexsort((slice_positions[:, varying_axis], time_indices))
+    sorted_time_indices = time_indices[order]
+    slice_indices = np.empty(len(path), dtype=int)
+    slice_indices[order] = np.arange(len(path)) - np.searchsorted(
+        sorted_time_indices, sorted_time_indices
+    )
+
+    # ! ---- 3. Step: Read pixel data into the 4d img
 
-    # Group and sort data into the time frames, converting the 3d tensor
-    # into a 4d img
+    # Allocate the 4d img, converting the 3d tensor into a 4d img
     time = sorted_times
     shape = (num_rows[0], num_cols[0], num_slices, len(time))
-    img = np.zeros(shape, dtype=voxel_data.dtype)
-    for i, date_time in enumerate(sorted_times):
-        # Fetch corresponding datetime in original format
-        index = sorted_indices[i]
-        unique_date_time = unique_acq_dates[index]
-
-        # Fetch all frames corresponding to the current time frame
-        time_frame = np.argwhere(acq_date_time_tuples == unique_date_time).flatten()
-
-        # For each time frame, sort data in slice-direction (stored as third component)
-        sorted_time_frame = np.argsort(slice_positions[time_frame, varying_axis])
-
-        # Apply sorting to the time frames
-        sorted_time_frame = time_frame[sorted_time_frame]
-
-        # Store data at right time
-        img[..., i] = voxel_data[..., sorted_time_frame]
+    img = np.zeros(shape, dtype=float)
+
+    # Rescale parameters of each sample, organized according to the 4d img
+    slope = np.zeros((num_slices, len(time)))
+    intercept = np.zeros((num_slices, len(time)))
+    slope[slice_indices, time_indices] = slopes
+    intercept[slice_indices, time_indices] = intercepts
+
+    def _read_into_slice(sample: int) -> None:
+        """Read pixel data from file (or cache) and store at the sorted location."""
+        signal = _load_cached_array(path[sample], cache_dir)
+        if signal is None:
+            signal = pydicom.dcmread(path[sample]).pixel_array
+            _save_cached_array(path[sample], cache_dir, signal)
+        img[..., slice_indices[sample], time_indices[sample]] = signal
+
+    # Read the pixel data - decoding releases the GIL, hence use concurrent threads.
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(_read_into_slice, order))
+
+    # Rescale all samples at once
+    np.multiply(img, slope[np.newaxis, np.newaxis], out=img)
+    np.add(img, intercept[np.newaxis, np.newaxis], out=img)
 
     # Reduce to sufficient size in special cases
     if dim == 2:
@@ -476,7 +654,7 @@ def imread_from_dicom(
         img = img[..., 0]
         time = time[0]
 
-    # ! ---- 3. Convert to Image
+    # ! ---- 4. Convert to Image
 
     # Pick first position simply as origin
     # TODO need to choose max, min, etc., define functionality in coordinatesyste,
@@ -520,6 +698,8 @@ def imread_from_vtu(
         shape (tuple of int): shape of target 2d pixelated array, in matrix indexing.
             series (bool): flag controlling whether a time series of images
                 is created.
+            use_gpu (bool): flag controlling whether the cell data is accumulated
+                on the GPU (requires cupy); default is False.
 
     Returns:
         darsia.Image: scalar image (space-time if list provided)
@@ -599,22 +779,23 @@ def _read_single_vtu_image(
     cells = vtu_data.cells[0].data
     data = vtu_data.cell_data[key][0]
 
+    # Interpretation of the Cartesian axes in terms of the indexing
+    interpreted_axes = [
+        darsia.interpret_indexing(axis, indexing) for axis in "xyz"[:dim]
+    ]
+
     # Fetch origin from points - take into account orientation of axes
     cartesian_origin = np.array([np.min(points[:, i]) for i in range(dim)])
     cartesian_opposite = np.array([np.max(points[:, i]) for i in range(dim)])
     origin = []
-    for i, axis in enumerate("xyz"[:dim]):
-        _, revert = darsia.interpret_indexing(axis, indexing)
+    for i, (_, revert) in enumerate(interpreted_axes):
         origin.append(cartesian_opposite[i] if revert else cartesian_origin[i])
 
     # Fetch dimensions from points - need to reshuffle to matrix indexing
     cartesian_dimensions = [
         np.max(points[:, i]) - np.min(points[:, i]) for i in range(dim)
     ]
-    dimensions = [
-        cartesian_dimensions[darsia.interpret_indexing(axis, indexing)[0]]
-        for axis in "xyz"[:dim]
-    ]
+    dimensions = [cartesian_dimensions[i] for i, _ in interpreted_axes]
 
     # Collect all metadata
     meta = {
@@ -626,7 +807,9 @@ def _read_single_vtu_image(
 
     # Create actual pixelated data
     if dim == vtu_dim:
-        data = _resample_data(data, points, cells, shape, meta)
+        data = _resample_data(
+            data, points, cells, shape, meta, use_gpu=kwargs.get("use_gpu", False)
+        )
     elif vtu_dim < dim:
         width = kwargs.get("width")  # effective width of lower-dimension object
         data, updated_dimensions, updated_origin = _embed_data(
@@ -644,6 +827,7 @@ def _resample_data(
     cells: np.ndarray,
     shape: tuple[int],
     meta: dict,
+    use_gpu: bool = False,
 ) -> np.ndarray:
     """Sampling of data on arbitrary mesh to regular voxel grids (in 2d and 3d).
 
@@ -653,84 +837,93 @@ def _resample_data(
         cells (array): connectivity of triangulation.
         shape (tuple of int): size of the target quad mesh in matrix indexing.
         meta (dict): meta data dictionary associated to image.
+        use_gpu (bool): flag controlling whether the cell data is accumulated on the
+            GPU; default is False.
+
+    Raises:
+        ImportError: if use_gpu is True and cupy is not installed
 
     """
     # Fetch meta data
     dim = meta["space_dim"]
     indexing = meta["indexing"]
 
+    # Interpretation of the Cartesian axes in terms of the indexing and vice versa
+    cart_ind = np.array(
+        [darsia.interpret_indexing(axis, indexing)[0] for axis in "xyz"[:dim]]
+    )
+    interpreted_indexing = [
+        darsia.interpret_indexing(index, "xyz"[:dim]) for index in indexing
+    ]
+    cartesian_indices = np.array([i for i, _ in interpreted_indexing])
+    revert = np.array([r for _, r in interpreted_indexing], dtype=bool)
+
     # Problem size
     num_cells, num_points_per_cell = cells.shape
     num_points, _ = points.shape
 
     # Corners of each cell
-    corners = [points[cells[:, i]] for i in range(num_points_per_cell)]
+    corners = points[cells]
 
     # Centroid as average of corners
-    centroids = sum(corners) / num_points_per_cell
+    centroids = corners.mean(axis=1)
 
     # Find associated Cartesian voxel to each centroid
     cartesian_origin = np.array([np.min(points[:, i]) for i in range(dim)])
     cartesian_dimensions = np.array(
         [np.max(points[:, i]) - np.min(points[:, i]) for i in range(dim)]
     )
-    cart_ind = np.array(
-        [darsia.interpret_indexing(axis, indexing)[0] for axis in "xyz"[:dim]]
-    )
     cartesian_shape = np.array(shape)[cart_ind]
-    cartesian_voxels = np.floor(
-        np.multiply(
-            np.divide(
-                centroids - np.outer(np.ones(num_cells), cartesian_origin),
-                np.outer(np.ones(num_cells), cartesian_dimensions),
-            ),
-            np.outer(np.ones(num_cells), cartesian_shape),
-        )
-    ).astype(int)
+    relative_centroids = centroids - cartesian_origin
+    relative_centroids /= cartesian_dimensions
+    relative_centroids *= cartesian_shape
+    cartesian_voxels = np.floor(relative_centroids, out=relative_centroids).astype(
+        np.intp
+    )
 
     # Translate between Cartesian and matrix indexing.
     # Requires two operations: reshuffling axes, reoirenting axis.
-    voxels = np.zeros_like(cartesian_voxels, dtype=int)
-    for i, index in enumerate(indexing):
-        cartesian_index, revert = darsia.interpret_indexing(index, "xyz"[:dim])
-        voxels[:, i] = (
-            shape[i] - 1 - cartesian_voxels[:, cartesian_index]
-            if revert
-            else cartesian_voxels[:, cartesian_index]
+    voxels = cartesian_voxels[:, cartesian_indices]
+    voxels[:, revert] = np.array(shape)[revert] - 1 - voxels[:, revert]
+
+    # Associate cell data to voxel data - average the data of all cells sharing a
+    # voxel. Accumulate in flat indexing.
+    flat_voxels = np.ravel_multi_index(tuple(voxels[:, j] for j in range(dim)), shape)
+    num_voxels = int(np.prod(shape))
+    if use_gpu:
+        try:
+            import cupy as cp
+        except ImportError:
+            raise ImportError("cupy not available on this system")
+
+        # Atomic accumulation on the GPU; device memory is reused through the
+        # default memory pool of cupy across repeated calls.
+        flat_voxels_gpu = cp.asarray(flat_voxels)
+        accumulated_data = cp.asnumpy(
+            cp.bincount(flat_voxels_gpu, weights=cp.asarray(data), minlength=num_voxels)
         )
-
-    # Associate cell data to voxel data
-    pixelated_data = np.zeros(shape, dtype=data.dtype)
-    voxels_indexing = tuple(voxels[:, j] for j in range(dim))
-    pixelated_data[voxels_indexing] += data
+        num_cells_per_voxel = cp.asnumpy(
+            cp.bincount(flat_voxels_gpu, minlength=num_voxels)
+        )
+    else:
+        accumulated_data = np.bincount(flat_voxels, weights=data, minlength=num_voxels)
+        num_cells_per_voxel = np.bincount(flat_voxels, minlength=num_voxels)
+    fill_in = (num_cells_per_voxel == 0).reshape(shape)
+    pixelated_data = np.divide(
+        accumulated_data,
+        num_cells_per_voxel,
+        out=np.zeros(num_voxels),
+        where=num_cells_per_voxel > 0,
+    ).reshape(shape)
+    pixelated_data = pixelated_data.astype(data.dtype, copy=False)
 
     # Fill-in values if required.
-    fill_in = np.ones(shape, dtype=bool)
-    fill_in[voxels_indexing] = False
-    have_value = np.logical_not(fill_in)
     if np.any(fill_in):
-        # Interpolate for all pixels
-        pixels = np.nonzero(have_value)
-        pixel_data = pixelated_data[pixels]
-        interpolator = NearestNDInterpolator(
-            np.transpose(np.vstack(pixels)), pixel_data
+        # Assign the value of the nearest pixel with value to all pixels
+        nearest_pixels = scipy.ndimage.distance_transform_edt(
+            fill_in, return_distances=False, return_indices=True
         )
-
-        # Define mesh as input for interpolation
-        Ny, Nx = shape
-        x = np.arange(Nx)
-        y = np.arange(Ny)
-        X_pixel, Y_pixel = np.meshgrid(x, y)
-        full_pixel_vector = np.transpose(
-            np.vstack((np.ravel(Y_pixel), np.ravel(X_pixel)))
-        )
-
-        # Evaluate interpolation
-        full_data_vector = interpolator(full_pixel_vector)
-        full_data = full_data_vector.reshape(shape)
-
-        # Assign to pixelated data
-        pixelated_data = full_data
+        pixelated_data = pixelated_data[tuple(nearest_pixels)]
 
     return pixelated_data
 
@@ -782,18 +975,28 @@ def _embed_data(
         raise NotImplementedError
     indexing = meta["indexing"]
 
+    # Interpretation of the Cartesian axes in terms of the indexing and vice versa
+    cart_ind = np.array(
+        [darsia.interpret_indexing(axis, indexing)[0] for axis in "xyz"[:dim]]
+    )
+    interpreted_indexing = [
+        darsia.interpret_indexing(index, "xyz"[:dim]) for index in indexing
+    ]
+    cartesian_indices = np.array([i for i, _ in interpreted_indexing])
+    revert = np.array([r for _, r in interpreted_indexing], dtype=bool)
+
     # Problem size
     num_cells, num_points_per_cell = cells.shape
     num_points, _ = points.shape
 
     # Corners of each cell
-    corners = [points[cells[:, i]] for i in range(num_points_per_cell)]
+    corners = points[cells]
 
     # Centroid as average of corners
-    centroids = sum(corners) / num_points_per_cell
+    centroids = corners.mean(axis=1)
 
     # Normals to each centroid - only works for 1d in 2d images
-    tangentials = points[cells[:, 1]] - points[cells[:, 0]]
+    tangentials = corners[:, 1] - corners[:, 0]
     rotation = np.array([[0, -1], [1, 0]], dtype=float)
     normals = np.transpose(rotation.dot(np.transpose(tangentials)))
     normals_length = np.linalg.norm(normals, axis=1)
@@ -801,17 +1004,11 @@ def _embed_data(
 
     # Provide a point cloud effectively lying on the higher-dimensional
     # representation of the lower-dimensional object.
-    points_lower = np.vstack(
-        tuple(
-            points[cells[:, i]] - 0.5 * width * unit_normals
-            for i in range(num_points_per_cell)
-        )
+    points_lower = (corners - 0.5 * width * unit_normals[:, np.newaxis]).reshape(
+        -1, dim
     )
-    points_upper = np.vstack(
-        tuple(
-            points[cells[:, i]] + 0.5 * width * unit_normals
-            for i in range(num_points_per_cell)
-        )
+    points_upper = (corners + 0.5 * width * unit_normals[:, np.newaxis]).reshape(
+        -1, dim
     )
     extruded_points = np.vstack((points, points_lower, points_upper))
 
@@ -823,9 +1020,6 @@ def _embed_data(
             for i in range(dim)
         ]
     )
-    cart_ind = np.array(
-        [darsia.interpret_indexing(axis, indexing)[0] for axis in "xyz"[:dim]]
-    )
     cartesian_shape = np.array(shape)[cart_ind]
     voxel_origin = [np.min(extruded_points[:, 0]), np.max(extruded_points[:, 1])]
 
@@ -836,84 +1030,83 @@ def _embed_data(
     cartesian_voxel_size = cartesian_dimensions / cartesian_shape
     min_voxel_size = np.min(cartesian_voxel_size)
 
-    # In normal direction.
+    # In normal direction - the centroids are followed by pairs of lower and upper
+    # extrusions, all stored in a preallocated array.
     normal_resolution = np.ceil(width / min_voxel_size).astype(int)
-    extruded_centroids = centroids.copy()
-    extruded_data = data.copy()
-    extruded_tangentials = tangentials.copy()
+    num_normally_extruded = num_cells * (1 + 2 * normal_resolution)
+    normally_extruded_centroids = np.empty((num_normally_extruded, dim))
+    normally_extruded_centroids[:num_cells] = centroids
+    offset = np.empty_like(centroids)
     for i in range(normal_resolution):
         fraction = 0.5 * width * i / normal_resolution
-        centroids_lower = centroids - fraction * unit_normals
-        centroids_upper = centroids + fraction * unit_normals
-        extruded_centroids = np.vstack(
-            (extruded_centroids, centroids_lower, centroids_upper)
+        np.multiply(fraction, unit_normals, out=offset)
+        start = num_cells * (1 + 2 * i)
+        np.subtract(
+            centroids,
+            offset,
+            out=normally_extruded_centroids[start : start + num_cells],
         )
-        extruded_data = np.hstack((extruded_data, data, data))
-        extruded_tangentials = np.vstack(
-            (extruded_tangentials, tangentials, tangentials)
+        np.add(
+            centroids,
+            offset,
+            out=normally_extruded_centroids[start + num_cells : start + 2 * num_cells],
         )
+    extruded_tangentials = np.tile(tangentials, (1 + 2 * normal_resolution, 1))
 
-    normally_extruded_centroids = extruded_centroids.copy()
-    normally_extruded_data = extruded_data.copy()
-
-    # In tangential direction.
+    # In tangential direction - analogous to the normal direction.
     tangential_resolution = np.ceil(np.max(normals_length / min_voxel_size)).astype(int)
+    num_extruded = num_normally_extruded * (1 + 2 * tangential_resolution)
+    extruded_centroids = np.empty((num_extruded, dim))
+    extruded_centroids[:num_normally_extruded] = normally_extruded_centroids
+    offset = np.empty_like(normally_extruded_centroids)
     for i in range(tangential_resolution):
         fraction = 0.5 * (i + 1) / tangential_resolution
-        extruded_centroids_along_tangential_lower = (
-            normally_extruded_centroids - fraction * extruded_tangentials
+        np.multiply(fraction, extruded_tangentials, out=offset)
+        start = num_normally_extruded * (1 + 2 * i)
+        np.subtract(
+            normally_extruded_centroids,
+            offset,
+            out=extruded_centroids[start : start + num_normally_extruded],
         )
-        extruded_centroids_along_tangential_upper = (
-            normally_extruded_centroids + fraction * extruded_tangentials
+        np.add(
+            normally_extruded_centroids,
+            offset,
+            out=extruded_centroids[
+                start + num_normally_extruded : start + 2 * num_normally_extruded
+            ],
         )
-        extruded_centroids = np.vstack(
-            (
-                extruded_centroids,
-                extruded_centroids_along_tangential_lower,
-                extruded_centroids_along_tangential_upper,
-            )
-        )
-        extruded_data = np.hstack(
-            (extruded_data, normally_extruded_data, normally_extruded_data)
-        )
-
-    num_extruded_centroids = extruded_centroids.shape[0]
+    extruded_data = np.tile(
+        data, (1 + 2 * normal_resolution) * (1 + 2 * tangential_resolution)
+    )
 
     # Determine the corresponding Cartesian voxels of the extruded centroids.
-    cartesian_voxels = np.floor(
-        np.multiply(
-            np.divide(
-                extruded_centroids
-                - np.outer(np.ones(num_extruded_centroids), cartesian_origin),
-                np.outer(np.ones(num_extruded_centroids), cartesian_dimensions),
-            ),
-            np.outer(np.ones(num_extruded_centroids), cartesian_shape),
-        )
-    ).astype(int)
+    relative_centroids = extruded_centroids - cartesian_origin
+    relative_centroids /= cartesian_dimensions
+    relative_centroids *= cartesian_shape
+    cartesian_voxels = np.floor(relative_centroids, out=relative_centroids).astype(
+        np.intp
+    )
 
     # Translate between Cartesian and matrix indexing.
     # Requires two operations: reshuffling axes, reoirenting axis.
-    voxels = np.zeros_like(cartesian_voxels, dtype=int)
-    for i, index in enumerate(indexing):
-        cartesian_index, revert = darsia.interpret_indexing(index, "xyz"[:dim])
-        voxels[:, i] = (
-            shape[i] - 1 - cartesian_voxels[:, cartesian_index]
-            if revert
-            else cartesian_voxels[:, cartesian_index]
-        )
-
-    # Allocate space for embedded data - use matrix indexing
-    # Associate cell data to voxel data
-    embedded_data = np.zeros(shape, dtype=data.dtype)
-    voxels_indexing = tuple(voxels[:, j] for j in range(dim))
-    embedded_data[voxels_indexing] += extruded_data
+    voxels = cartesian_voxels[:, cartesian_indices]
+    voxels[:, revert] = np.array(shape)[revert] - 1 - voxels[:, revert]
+
+    # Associate cell data to voxel data - use matrix indexing. Accumulate in flat
+    # indexing; contributions of all extruded centroids sharing a voxel are summed up.
+    flat_voxels = np.ravel_multi_index(tuple(voxels[:, j] for j in range(dim)), shape)
+    embedded_data = (
+        np.bincount(flat_voxels, weights=extruded_data, minlength=int(np.prod(shape)))
+        .reshape(shape)
+        .astype(data.dtype, copy=False)
+    )
 
     # If the option 'conservative' is chosen, rescale the image such that the
     # volumetric integrals are identical.
     if conservative:
         # Integrate input data
         extruded_cell_volumes = np.linalg.norm(normals, axis=1) * width
-        integrated_data = np.sum(np.multiply(data, extruded_cell_volumes))
+        integrated_data = np.dot(data, extruded_cell_volumes)
 
         # Integrated reconstructed data
         voxel_volume = np.prod(cartesian_voxel_size)
@@ -924,9 +1117,6 @@ def _embed_data(
 
     # Due to the effective widening of the lower-dimensional object,
     # the dimensions have possibly changed.
-    to_matrix_indexing = [
-        darsia.interpret_indexing("ijk"[i], "xyz"[:dim])[0] for i in range(dim)
-    ]
-    dimensions = [cartesian_dimensions[i] for i in to_matrix_indexing]
+    dimensions = [cartesian_dimensions[i] for i in cartesian_indices]
 
     return embedded_data, dimensions, voxel_origin
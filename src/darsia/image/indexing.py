@@ -22,6 +22,7 @@ the x-axis.
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Union
 
 import numpy as np
@@ -91,6 +92,7 @@ def to_cartesian_indexing(axis: Union[str, int], indexing: str) -> str:
     raise ValueError
 
 
+@lru_cache(maxsize=64)
 def interpret_indexing(axis: str, indexing: str) -> tuple[int, bool]:
     """Interpretation of axes and their indexing.
 
@@ -33,6 +33,7 @@ def extract_quadrilateral_ROI(
     pts_src: Optional[Union[list, darsia.VoxelArray, np.ndarray]] = None,
     indexing: Literal["matrix", "reverse matrix"] = "reverse matrix",
     interpolation: InterpolationOption = "inter_linear",
+    out: Optional[np.ndarray] = None,
     **kwargs
 ) -> np.ndarray:
     """
@@ -46,6 +47,9 @@ def extract_quadrilateral_ROI(
         indexing (IndexingOption): indexing of pixel (only relevant if pts_src is list
             or np.ndarray)
         interpolation (InterpolationOption): interpolation method; adopted from cv2.
+        out (np.ndarray, optional): contiguous float32 or float64 buffer of the target
+            shape to warp into; the warping is then performed in the precision of the
+            buffer, and the buffer is returned.
         kwargs (optional keyword arguments):
             width (int or float): width of the physical object
             height (int or float): height of the physical object
@@ -160,6 +164,19 @@ def extract_quadrilateral_ROI(
     else:
         raise NotImplementedError
 
+    # Warp directly into the provided buffer, avoiding any allocation of the result.
+    if out is not None:
+        assert out.shape[:2] == (height, width) and out.flags.c_contiguous
+        assert out.dtype in [np.float32, np.float64]
+        cv2.warpPerspective(
+            np.ascontiguousarray(img_src, dtype=out.dtype),
+            P,
+            (width, height),
+            dst=out,
+            flags=interpolation_flag,  # type: ignore
+        )
+        return out
+
     # Warp source image. Warping may convert a 3-tensor to a 2-tensor.
     # Force to use a 3-tensor structure.
     img_dst = np.atleast_3d(
@@ -276,6 +276,9 @@ class VariationalWassersteinDistance(darsia.EMD):
             "pressure",
         ], f"Formulation {self.formulation} not supported."
 
+        # Setup options for multilevel solvers - only depend on static options
+        self.setup_amg_options()
+
         # Setup inrastructure for Schur complement reduction
         if self.formulation == "flux_reduced":
             self.setup_eliminate_flux()
@@ -333,24 +336,22 @@ class VariationalWassersteinDistance(darsia.EMD):
         user_defined_amg_options = self.options.get("amg_options", {})
         self.amg_options.update(user_defined_amg_options)
 
-    def setup_amg_solver(self, matrix: sps.csc_matrix) -> None:
+    def setup_amg_solver(self, matrix: Union[sps.csr_matrix, sps.csc_matrix]) -> None:
         """Setup an AMG solver for the given matrix.
 
         Args:
-            matrix (sps.csc_matrix): matrix
+            matrix (sps.csr_matrix or sps.csc_matrix): matrix; CSR format is used
+                without conversion
 
         Defines:
             pyamg.amg_core.solve: AMG solver
             dict: options for the AMG solver
 
         """
-        # Define AMG solver
-        self.setup_amg_options()
-        with warnings.catch_warnings():
-            warnings.filterwarnings("ignore", message="Implicit conversion of A to CSR")
-            self.linear_solver = pyamg.smoothed_aggregation_solver(
-                matrix, **self.amg_options
-            )
+        # Define AMG solver - pyamg operates on CSR matrices
+        self.linear_solver = pyamg.smoothed_aggregation_solver(
+            matrix.tocsr(), **self.amg_options
+        )
 
         # Define solver options
         linear_solver_options = self.options.get("linear_solver_options", {})
@@ -365,27 +366,28 @@ class VariationalWassersteinDistance(darsia.EMD):
         }
         """dict: options for the iterative linear solver"""
 
-    def setup_cg_solver(self, matrix: sps.csc_matrix) -> None:
+    def setup_cg_solver(self, matrix: Union[sps.csr_matrix, sps.csc_matrix]) -> None:
         """Setup an CG solver with AMG preconditioner for the given matrix.
 
         Args:
-            matrix (sps.csc_matrix): matrix
+            matrix (sps.csr_matrix or sps.csc_matrix): matrix; CSR format is used
+                without conversion
 
         Defines:
             pyamg.amg_core.solve: AMG solver
             dict: options for the AMG solver
 
         """
+        # Convert to CSR format once, shared by CG and the AMG preconditioner.
+        matrix = matrix.tocsr()
+
         # Define CG solver
         self.linear_solver = darsia.linalg.CG(matrix)
 
         # Define AMG preconditioner
-        self.setup_amg_options()
-        with warnings.catch_warnings():
-            warnings.filterwarnings("ignore", message="Implicit conversion of A to CSR")
-            amg = pyamg.smoothed_aggregation_solver(
-                matrix, **self.amg_options
-            ).aspreconditioner(cycle="V")
+        amg = pyamg.smoothed_aggregation_solver(
+            matrix, **self.amg_options
+        ).aspreconditioner(cycle="V")
 
         # Define solver options
         linear_solver_options = self.options.get("linear_solver_options", {})
@@ -463,10 +465,9 @@ class VariationalWassersteinDistance(darsia.EMD):
         """np.ndarray: indices to be removed in the reduced system"""
 
         # Identify rows to be reduced
-        rm_rows = [
-            np.max(np.where(self.reduced_jacobian.indptr <= index)[0])
-            for index in rm_indices
-        ]
+        rm_rows = (
+            np.searchsorted(self.reduced_jacobian.indptr, rm_indices, side="right") - 1
+        )
 
         # Reduce data - simply remove
         fully_reduced_jacobian_data = np.delete(self.reduced_jacobian.data, rm_indices)
@@ -976,8 +977,9 @@ class VariationalWassersteinDistance(darsia.EMD):
         ), "Jacobian should be a CSC matrix."
 
         # Effective Gauss-elimination for the particular case of the lagrange multiplier
+        # NOTE: np.delete returns a new array, no explicit copy required
         self.fully_reduced_jacobian.data[:] = np.delete(
-            reduced_jacobian.data.copy(), self.rm_indices
+            reduced_jacobian.data, self.rm_indices
         )
         # NOTE: The indices have to be restored if the LU factorization is to be used
         # FIXME omit if not required
@@ -988,9 +990,8 @@ class VariationalWassersteinDistance(darsia.EMD):
         # If not, we need to do a proper Gauss elimination on the right hand side!
         if abs(reduced_residual[-1]) > 1e-6:
             raise NotImplementedError("Implementation requires residual to be zero.")
-        fully_reduced_residual = reduced_residual[
-            self.fully_reduced_system_indices
-        ].copy()
+        # NOTE: Indexing with an index array already returns a copy
+        fully_reduced_residual = reduced_residual[self.fully_reduced_system_indices]
 
         return self.fully_reduced_jacobian, fully_reduced_residual
 
@@ -4,14 +4,86 @@ definition of a restoration object.
 
 """
 
-from typing import Union
+from typing import Optional, Union
 
+import numba
 import numpy as np
 import skimage
 
 import darsia
 
 
+@numba.njit(parallel=True, fastmath=True, cache=True)
+def _tvd_chambolle_numba(
+    img: np.ndarray, weight: float, eps: float, max_num_iter: int, tau: float
+) -> np.ndarray:
+    """Numba kernel for isotropic TV denoising using Chambolle's projection algorithm.
+
+    Equivalent to skimage.restoration.denoise_tv_chambolle (without channel axis), but
+    each iteration is performed in two parallel sweeps: the first evaluates the
+    divergence of the dual variable and the current iterate, the second the gradient
+    of the iterate and the update of the dual variable.
+
+    Args:
+        img (np.ndarray): 3d float image; 2d images are embedded with a trivial third
+            axis
+        weight (float): denoising weight
+        eps (float): relative tolerance for the change of the energy
+        max_num_iter (int): maximal number of iterations
+        tau (float): step size, 1 / (2 * dim) for the actual dimension of the image
+
+    Returns:
+        np.ndarray: denoised image
+
+    """
+    n0, n1, n2 = img.shape
+    p = np.zeros((3, n0, n1, n2), dtype=img.dtype)
+    out = img.copy()
+    energy_init = 0.0
+    energy_previous = 0.0
+    for iter in range(max_num_iter):
+        # Update the iterate, using the (negative) divergence of the dual variable
+        energy = 0.0
+        if iter > 0:
+            for i in numba.prange(n0):
+                for j in range(n1):
+                    for k in range(n2):
+                        d = -(p[0, i, j, k] + p[1, i, j, k] + p[2, i, j, k])
+                        if i > 0:
+                            d += p[0, i - 1, j, k]
+                        if j > 0:
+                            d += p[1, i, j - 1, k]
+                        if k > 0:
+                            d += p[2, i, j, k - 1]
+                        out[i, j, k] = img[i, j, k] + d
+                        energy += d * d
+
+        # Update the dual variable, using the gradient of the iterate
+        norm_sum = 0.0
+        for i in numba.prange(n0):
+            for j in range(n1):
+                for k in range(n2):
+                    g0 = out[i + 1, j, k] - out[i, j, k] if i < n0 - 1 else 0.0
+                    g1 = out[i, j + 1, k] - out[i, j, k] if j < n1 - 1 else 0.0
+                    g2 = out[i, j, k + 1] - out[i, j, k] if k < n2 - 1 else 0.0
+                    norm = np.sqrt(g0 * g0 + g1 * g1 + g2 * g2)
+                    norm_sum += norm
+                    scaling = 1.0 / (1.0 + tau / weight * norm)
+                    p[0, i, j, k] = (p[0, i, j, k] - tau * g0) * scaling
+                    p[1, i, j, k] = (p[1, i, j, k] - tau * g1) * scaling
+                    p[2, i, j, k] = (p[2, i, j, k] - tau * g2) * scaling
+
+        # Check convergence of the energy
+        energy = (energy + weight * norm_sum) / img.size
+        if iter == 0:
+            energy_init = energy
+        elif abs(energy_previous - energy) < eps * energy_init:
+            break
+        energy_previous = energy
+
+    return out
+
+
 class TVD:
     """Total variation denoising interface.
 
@@ -40,8 +112,42 @@ class TVD:
         self.weight = kwargs.pop(key + "weight", 0.1)
         self.max_num_iter = kwargs.pop(key + "max_num_iter", 200)
         self.eps = kwargs.pop(key + "eps", 2e-4)
+        self.channel_axis = kwargs.pop(key + "channel_axis", None)
         self.kwargs = kwargs
 
+        # Resolve the denoising routine and its arguments once
+        general_kwargs = {
+            "weight": self.weight,
+            "max_num_iter": self.max_num_iter,
+            "eps": self.eps,
+            "channel_axis": self.channel_axis,
+        }
+        if self.method == "chambolle":
+            self._denoise = self._tvd_chambolle
+            self._kwargs = general_kwargs
+
+        elif self.method == "anisotropic bregman":
+            self._denoise = skimage.restoration.denoise_tv_bregman
+            self._kwargs = {**general_kwargs, "isotropic": False}
+
+        elif self.method == "isotropic bregman":
+            self._denoise = skimage.restoration.denoise_tv_bregman
+            self._kwargs = {**general_kwargs, "isotropic": True}
+
+        elif self.method == "heterogeneous bregman":
+            self._denoise = darsia.split_bregman_tvd
+            self._kwargs = {
+                "mu": self.weight,
+                "omega": self.omega,
+                "ell": self.regularization,
+                "max_num_iter": self.max_num_iter,
+                "eps": self.eps,
+                **self.kwargs,
+            }
+
+        else:
+            raise ValueError(f"Method {self.method} not supported.")
+
     def __call__(
         self, img: Union[np.ndarray, darsia.Image]
     ) -> Union[np.ndarray, darsia.Image]:
@@ -73,46 +179,67 @@ class TVD:
 
         """
 
-        # Apply TVD
-        if self.method == "chambolle":
-            return skimage.restoration.denoise_tv_chambolle(
-                img,
-                weight=self.weight,
-                max_num_iter=self.max_num_iter,
-                eps=self.eps,
-            )
+        # Denoise double precision images in single precision, which is sufficient
+        # for the tolerances of TVD and halves the memory traffic. NOTE: The
+        # heterogeneous Bregman method is restricted to double precision.
+        if img.dtype == np.float64 and self.method != "heterogeneous bregman":
+            return self._tvd_array(img.astype(np.float32)).astype(np.float64)
 
-        elif self.method == "anisotropic bregman":
-            return skimage.restoration.denoise_tv_bregman(
-                img,
-                weight=self.weight,
-                max_num_iter=self.max_num_iter,
-                eps=self.eps,
-                isotropic=False,
-            )
+        # Apply TVD
+        return self._denoise(img, **self._kwargs)
+
+    def _tvd_chambolle(
+        self,
+        img: np.ndarray,
+        weight: float,
+        max_num_iter: int,
+        eps: float,
+        channel_axis: Optional[int] = None,
+    ) -> np.ndarray:
+        """Application of Chambolle's projection algorithm to numpy array.
 
-        elif self.method == "isotropic bregman":
-            return skimage.restoration.denoise_tv_bregman(
-                img,
-                weight=self.weight,
-                max_num_iter=self.max_num_iter,
-                eps=self.eps,
-                isotropic=True,
-            )
+        Args:
+            img (np.ndarray): image
+            weight (float): denoising weight
+            max_num_iter (int): maximal number of iterations
+            eps (float): relative tolerance for the change of the energy
+            channel_axis (int, optional): axis of the channels, which are denoised
+                separately; if None, all axes are treated as spatial axes
 
-        elif self.method == "heterogeneous bregman":
-            return darsia.split_bregman_tvd(
-                img,
-                mu=self.weight,
-                omega=self.omega,
-                ell=self.regularization,
-                max_num_iter=self.max_num_iter,
-                eps=self.eps,
-                **self.kwargs,
-            )
+        Returns:
+            np.ndarray: denoised image
 
-        else:
-            raise ValueError(f"Method {self.method} not supported.")
+        """
+        if channel_axis is not None and np.isscalar(weight):
+            # Denoise each channel separately
+            out = np.empty_like(img)
+            for img_channel, out_channel in zip(
+                np.moveaxis(img, channel_axis, 0), np.moveaxis(out, channel_axis, 0)
+            ):
+                out_channel[...] = self._tvd_chambolle(
+                    img_channel, weight, max_num_iter, eps
+                )
+            return out
+        if (
+            img.dtype in [np.float32, np.float64]
+            and img.ndim in [2, 3]
+            and np.isscalar(weight)
+        ):
+            # Fast parallel implementation; treat 2d images as 3d images
+            return _tvd_chambolle_numba(
+                img[..., np.newaxis] if img.ndim == 2 else img,
+                weight,
+                eps,
+                max_num_iter,
+                1.0 / (2.0 * img.ndim),
+            ).reshape(img.shape)
+        return skimage.restoration.denoise_tv_chambolle(
+            img,
+            weight=weight,
+            max_num_iter=max_num_iter,
+            eps=eps,
+            channel_axis=channel_axis,
+        )
 
     def _tvd_image(self, img: darsia.Image) -> darsia.Image:
         """Application of anisotropic resizing and tv denoising to darsia.Image.
@@ -148,6 +275,7 @@ def tvd(
         **kwargs: additional arguments
             - omega (array or float): data fidelity weight for heterogeneous bregman
             - regularization (float): regularization parameter for heterogeneous bregman
+            - channel_axis (int): axis of the channels, which are denoised separately
 
     Returns:
         np.ndarray or Image: upscaled image (same type as input)
@@ -48,11 +48,61 @@ class HeterogeneousModel(Model):
         for i in range(self.masks.size):
             self.obj[i] = copy.copy(obj)
 
+        # Cache for the grouping of the pixels by label, see _group_pixels
+        self._grouped_labels: Optional[np.ndarray] = None
+        self._order: Optional[np.ndarray] = None
+        self._boundaries: Optional[np.ndarray] = None
+
+    def _group_pixels(self) -> tuple[np.ndarray, np.ndarray]:
+        """Group the flat pixel indices by label.
+
+        The pixels of the i-th label, wrt. the sorted unique labels as used by
+        darsia.Masks, are addressed by order[boundaries[i] : boundaries[i + 1]].
+        The grouping is cached, and updated if the label image is replaced.
+
+        Returns:
+            np.ndarray: flat pixel indices, sorted by label
+            np.ndarray: boundaries of the index ranges of all labels
+
+        """
+        labels = self.masks.labels.img
+        if self._grouped_labels is not labels:
+            flat_labels = labels.ravel()
+            self._order = np.argsort(flat_labels, kind="stable")
+            sorted_labels = flat_labels[self._order]
+            self._boundaries = np.concatenate(
+                (
+                    [0],
+                    np.flatnonzero(sorted_labels[1:] != sorted_labels[:-1]) + 1,
+                    [flat_labels.size],
+                )
+            )
+            assert (
+                len(self._boundaries) == self.masks.size + 1
+            ), "Number of labels does not match the number of models."
+            self._grouped_labels = labels
+        return self._order, self._boundaries
+
     def __call__(self, signal: np.ndarray) -> np.ndarray:
-        output = np.zeros(signal.shape[:2])  # TODO shape?
-        for i, mask in enumerate(self.masks):
-            output[mask.img] = self[i](signal[mask.img])
-        return output
+        """Translation of signal to data, using the model of the respective label.
+
+        Args:
+            signal (np.ndarray): signal, with leading axes of the shape of the labels,
+                and possibly further (e.g. color) axes.
+
+        Returns:
+            np.ndarray: scalar data of the shape of the labels.
+
+        """
+        # Output and signal in flat format, with labels defining the leading axes
+        shape = self.masks.labels.img.shape
+        flat_signal = signal.reshape(-1, *signal.shape[len(shape) :])
+        output = np.zeros(flat_signal.shape[0])
+        order, boundaries = self._group_pixels()
+        for i in range(self.masks.size):
+            indices = order[boundaries[i] : boundaries[i + 1]]
+            output[indices] = self[i](flat_signal[indices])
+        return output.reshape(shape)
 
     def __getitem__(self, key):
         return self.obj[key]
@@ -1,21 +1,72 @@
 """Wrapper to Krylov subspace methods from SciPy."""
 
+from typing import Optional
+from warnings import warn
+
 import numpy as np
 import scipy.sparse as sps
-from scipy.sparse.linalg import cg, gmres
+from scipy.sparse.linalg import aslinearoperator, cg, gmres
 
 
 class CG:
     def __init__(self, A: sps.csc_matrix) -> None:
         self.A = A
+        # Wrap the matrix as linear operator once, to be reused across solves
+        self.A_op = aslinearoperator(A)
+        # Jacobi preconditioner, used unless another preconditioner is provided;
+        # assembled on first use
+        self.M: Optional[sps.dia_matrix] = None
+
+    def setup_jacobi(self) -> None:
+        """Assemble the Jacobi preconditioner.
+
+        Rows with zero diagonal entries are left unscaled.
+
+        """
+        diagonal = self.A.diagonal()
+        zero_diagonal = diagonal == 0
+        if np.any(zero_diagonal):
+            warn(
+                "Zero diagonal entries in matrix, not scaled by Jacobi preconditioner."
+            )
+        inverse_diagonal = np.ones(diagonal.shape)
+        np.divide(1.0, diagonal, out=inverse_diagonal, where=~zero_diagonal)
+        self.M = sps.diags(inverse_diagonal)
 
     def solve(self, b: np.ndarray, **kwargs) -> np.ndarray:
-        return cg(self.A, b, **kwargs)[0]
+        if "M" not in kwargs:
+            if self.M is None:
+                self.setup_jacobi()
+            kwargs["M"] = self.M
+        return cg(self.A_op, b, **kwargs)[0]
+
+    def solve_multi(self, B: np.ndarray, **kwargs) -> np.ndarray:
+        """Solve for multiple right hand sides.
+
+        Args:
+            B (np.ndarray): right hand sides, stored as columns.
+            kwargs: keyword arguments passed to scipy.sparse.linalg.cg; an initial
+                guess 'x0' is only used for the first column.
+
+        Returns:
+            np.ndarray: solutions, stored as columns.
+
+        """
+        # Solve for each column of B, warm-starting each solve with the solution
+        # of the previous column, as similar right hand sides have similar solutions
+        X = np.zeros(B.shape, dtype=np.result_type(self.A.dtype, B.dtype))
+        x0 = kwargs.pop("x0", None)
+        for j in range(B.shape[1]):
+            X[:, j] = self.solve(B[:, j], x0=x0, **kwargs)
+            x0 = X[:, j]
+        return X
 
 
 class GMRES:
     def __init__(self, A: sps.csc_matrix) -> None:
         self.A = A
+        # Wrap the matrix as linear operator once, to be reused across solves
+        self.A_op = aslinearoperator(A)
 
     def solve(self, b: np.ndarray, **kwargs) -> np.ndarray:
-        return gmres(self.A, b, **kwargs)[0]
+        return gmres(self.A_op, b, **kwargs)[0]
@@ -37,20 +37,21 @@ class CG(da.Solver):
         def _mv(x: np.ndarray) -> np.ndarray:
             # Reshape the input to nd array
             x = np.reshape(x, x0.shape)
-            # Apply the operator and flatten the output
+            # Apply the operator and flatten the output (without copy)
             return (
                 self.mass_coeff * x
                 - da.laplace(x, dim=self.dim, h=h, diffusion_coeff=self.diffusion_coeff)
-            ).flatten()
+            ).ravel()
 
         # Define the linear operator
         lhsoperator = LinearOperator((_dof, _dof), matvec=_mv)
 
-        # Solve the problem using scipys conjugate gradient solver
+        # Solve the problem using scipys conjugate gradient solver - use flat views of
+        # the right hand side and initial guess, avoiding copies.
         x, _ = sps.linalg.cg(
             lhsoperator,
-            rhs.flatten(),
-            x0.flatten(),
+            rhs.ravel(),
+            x0.ravel(),
             tol=self.tol,
             maxiter=self.maxiter,
         )
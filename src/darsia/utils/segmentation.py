@@ -4,11 +4,14 @@
 
 from __future__ import annotations
 
-from typing import Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Optional, Union
 from warnings import warn
 
 import cv2
 import matplotlib.pyplot as plt
+import numba
 import numpy as np
 import skimage
 from scipy import ndimage as ndi
@@ -45,6 +48,15 @@ def segment(
                 TVD with fixed settings.
             "median disk radius" (int): disk radius to be considered to smooth
                 the image using rank based median, before the analysis.
+            "median footprint" (str): "disk" or "square", footprint of the median
+                filter; the latter uses a square of size 2 * radius + 1 and OpenCV's
+                constant-time median, which is considerably faster for large radii;
+                default is "disk".
+            "tvd chunk size" (int): if provided, 'tvd' smoothing is performed on
+                overlapping chunks of this size in parallel threads, which only
+                approximates the denoising of the entire image; default is None.
+            "tvd chunk depth" (int): overlap of the chunks in each direction;
+                default is 32.
             "rescaling factor" (float): factor how the image is scaled before
                 the actual watershed segmentation.
             "monochromatic_color" (str): "gray", "red", "green", "blue", or "value",
@@ -52,9 +64,14 @@ def segment(
                 default is gray.
             "boundaries" (list of str): containing elements among "top", "bottom",
                 "right", "left". These will be omitted in the cleaning routine.
+            "contrast enhancement" (str): "skimage" or "opencv", deciding which
+                implementation of the logarithmic correction and adaptive histogram
+                equalization is used; the latter operates on ubyte images and is
+                considerably faster, but not identical; default is "skimage".
 
     Returns:
-        np.ndarray or darsia.Image: labeled regions in the same format as img.
+        np.ndarray or darsia.Image: labeled regions in the same format as img; the
+            labels are of ubyte type if possible, and of int32 type otherwise.
     """
 
     # ! ---- Preprocessing of input image
@@ -67,9 +84,15 @@ def segment(
     else:
         raise ValueError(f"img of type {type(img)} not supported.")
 
-    # basis = skimage.exposure.adjust_gamma(basis, 1.3)
-    basis = skimage.exposure.adjust_log(basis, 1)
-    basis = skimage.exposure.equalize_adapthist(basis)
+    contrast_enhancement = kwargs.get("contrast enhancement", "skimage")
+    if contrast_enhancement == "skimage":
+        # basis = skimage.exposure.adjust_gamma(basis, 1.3)
+        basis = skimage.exposure.adjust_log(basis, 1)
+        basis = skimage.exposure.equalize_adapthist(basis)
+    elif contrast_enhancement == "opencv":
+        basis = _enhance_contrast(basis)
+    else:
+        raise ValueError(f"Contrast enhancement {contrast_enhancement} not supported.")
 
     # Require scalar representation - the most natural general choice is either to
     # use a grayscale representation or the value component of the HSV version,
@@ -110,13 +133,36 @@ def segment(
 
     if smoothing_method == "median":
         median_disk_radius = kwargs.get("median disk radius", 20)
-        denoised = skimage.filters.rank.median(
-            basis_ubyte, skimage.morphology.disk(median_disk_radius)
-        )
+        median_footprint = kwargs.get("median footprint", "disk")
+        if median_footprint == "disk":
+            denoised = skimage.filters.rank.median(
+                basis_ubyte, _disk(median_disk_radius)
+            )
+        elif median_footprint == "square":
+            denoised = cv2.medianBlur(basis_ubyte, 2 * median_disk_radius + 1)
+        else:
+            raise ValueError(f"Median footprint {median_footprint} not supported.")
     elif smoothing_method == "tvd":
-        denoised = skimage.restoration.denoise_tv_bregman(
-            basis_ubyte, weight=0.1, eps=1e-4, max_num_iter=100, isotropic=False
-        )
+        # Denoise in single precision, which is sufficient for the ubyte input and
+        # halves the memory traffic compared to the default double precision.
+        def _denoise(img: np.ndarray) -> np.ndarray:
+            return skimage.restoration.denoise_tv_bregman(
+                img, weight=0.1, eps=1e-4, max_num_iter=100, isotropic=False
+            )
+
+        basis_float32 = skimage.img_as_float32(basis_ubyte)  # type: ignore[attr-defined]
+        chunk_size = kwargs.get("tvd chunk size")
+        if chunk_size is None:
+            denoised = _denoise(basis_float32)
+        else:
+            chunk_depth = kwargs.get("tvd chunk depth", 32)
+            denoised = _apply_chunkwise(
+                _denoise, basis_float32, chunk_size, chunk_depth
+            )
+        # The Bregman iterations may slightly overshoot the range of the input,
+        # in particular on small chunks, which is not admissible for the conversion
+        # to ubyte below.
+        np.clip(denoised, 0, 1, out=denoised)
 
     if verbosity:
         plt.figure("Denoised input image")
@@ -203,9 +249,11 @@ def segment(
     # Process the watershed algorithm
     if mask is None:
         mask = np.ones(edges.shape[:2], dtype=bool)
-    labels_rescaled = skimage.img_as_ubyte(  # type: ignore[attr-defined]
-        skimage.segmentation.watershed(edges, labeled_markers, mask=mask)
-    )
+    # NOTE: Keep the labels as integers, as casting to ubyte would scale (and thereby
+    # destroy) label images with more than 255 labels.
+    labels_rescaled = skimage.segmentation.watershed(
+        edges, labeled_markers, mask=mask
+    ).astype(np.int32, copy=False)
 
     # ! ---- Postprocessing of the labels
 
@@ -213,12 +261,10 @@ def segment(
     labels_rescaled = _dilate_by_size(labels_rescaled, 1, True)
 
     # Resize to original size
-    labels = skimage.img_as_ubyte(  # type: ignore[attr-defined]
-        cv2.resize(
-            labels_rescaled,
-            tuple(reversed(basis.shape[:2])),
-            interpolation=cv2.INTER_NEAREST,
-        )
+    labels = cv2.resize(
+        labels_rescaled,
+        tuple(reversed(basis.shape[:2])),
+        interpolation=cv2.INTER_NEAREST,
     )
 
     if verbosity:
@@ -240,6 +286,10 @@ def segment(
         plt.imshow(basis, alpha=0.5)
         plt.show()
 
+    # Use ubyte labels if sufficient
+    if labels.max() < 256:
+        labels = labels.astype(np.uint8)
+
     # Return data in the same format as the input data
     if isinstance(img, np.ndarray):
         return labels
@@ -251,6 +301,131 @@ def segment(
 # ! ---- Auxiliary functions for segment
 
 
+@lru_cache(maxsize=16)
+def _disk(radius: int) -> np.ndarray:
+    """
+    Cached disk-shaped footprint, reused across calls of segment.
+
+    Args:
+        radius (int): radius of the disk.
+
+    Returns:
+        np.ndarray: read-only footprint.
+    """
+    footprint = skimage.morphology.disk(radius)
+    footprint.flags.writeable = False
+    return footprint
+
+
+def _apply_chunkwise(
+    func: Callable[[np.ndarray], np.ndarray],
+    img: np.ndarray,
+    chunk_size: int,
+    depth: int,
+) -> np.ndarray:
+    """
+    Apply a filter on overlapping chunks of a 2d image in parallel threads.
+
+    Each chunk is extended by the overlap (as far as the image allows), filtered, and
+    only its core is written to the result. Meant for filters releasing the GIL.
+
+    Args:
+        func (Callable): filter, mapping an array to an array of the same shape.
+        img (np.ndarray): input image.
+        chunk_size (int): size of the chunks in each direction.
+        depth (int): overlap of the chunks in each direction.
+
+    Returns:
+        np.ndarray: filtered image.
+    """
+    rows, cols = img.shape[:2]
+    result = np.empty_like(img)
+
+    def _apply_to_chunk(corner: tuple[int, int]) -> None:
+        row, col = corner
+        row_end, col_end = min(row + chunk_size, rows), min(col + chunk_size, cols)
+        row_ext, col_ext = max(row - depth, 0), max(col - depth, 0)
+        chunk = func(
+            img[
+                row_ext : min(row_end + depth, rows),
+                col_ext : min(col_end + depth, cols),
+            ]
+        )
+        result[row:row_end, col:col_end] = chunk[
+            row - row_ext : row_end - row_ext, col - col_ext : col_end - col_ext
+        ]
+
+    corners = [
+        (row, col)
+        for row in range(0, rows, chunk_size)
+        for col in range(0, cols, chunk_size)
+    ]
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(_apply_to_chunk, corners))
+
+    return result
+
+
+def _enhance_contrast(img: np.ndarray) -> np.ndarray:
+    """
+    Logarithmic correction and adaptive histogram equalization based on OpenCV.
+
+    Ubyte counterpart of skimage.exposure.adjust_log and
+    skimage.exposure.equalize_adapthist with default parameters. The logarithmic
+    correction is applied through a lookup table. As in skimage, color images are
+    equalized in the value channel in HSV space, and the intensities are stretched
+    to the full range before and after the equalization.
+
+    Args:
+        img (np.ndarray): input image, grayscale or in RGB color space.
+
+    Returns:
+        np.ndarray: enhanced ubyte image.
+    """
+    img_ubyte = skimage.img_as_ubyte(img)  # type: ignore[attr-defined]
+
+    # Logarithmic correction, following skimage.exposure.adjust_log
+    lut = (np.log2(1 + np.arange(256) / 255) * 255).astype(np.uint8)
+    img_ubyte = cv2.LUT(img_ubyte, lut)
+
+    # CLAHE on 8 x 8 tiles; the relative clip limit of skimage (0.01) corresponds
+    # to a clip limit of 0.01 * 256 wrt the mean bin count in OpenCV
+    clahe = cv2.createCLAHE(clipLimit=2.56, tileGridSize=(8, 8))
+
+    def _equalize(channel: np.ndarray) -> np.ndarray:
+        channel = cv2.normalize(channel, None, 0, 255, cv2.NORM_MINMAX)
+        return cv2.normalize(clahe.apply(channel), None, 0, 255, cv2.NORM_MINMAX)
+
+    if img_ubyte.ndim == 2:
+        return _equalize(img_ubyte)
+    hsv = cv2.cvtColor(img_ubyte, cv2.COLOR_RGB2HSV)
+    hsv[:, :, 2] = _equalize(np.ascontiguousarray(hsv[:, :, 2]))
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2RGB)
+
+
+def _fast_gradient(img: np.ndarray, radius: int) -> np.ndarray:
+    """
+    Fast approximation of the rank based gradient (local max - min) of an image.
+
+    The Sobel gradient magnitude is averaged over a square of size 2 * radius + 1.
+    Both are separable filters with cost independent of the radius, while the rank
+    based gradient over a disk has a cost growing with the radius. The values are
+    not identical to the rank based gradient, such that thresholds may require
+    retuning.
+
+    Args:
+        img (np.ndarray): ubyte input image.
+        radius (int): radius of the neighborhood.
+
+    Returns:
+        np.ndarray: ubyte gradient image.
+    """
+    gx = cv2.Sobel(img, cv2.CV_32F, 1, 0)
+    gy = cv2.Sobel(img, cv2.CV_32F, 0, 1)
+    magnitude = cv2.convertScaleAbs(cv2.magnitude(gx, gy))
+    return cv2.boxFilter(magnitude, -1, (2 * radius + 1, 2 * radius + 1))
+
+
 def _detect_markers_from_gradient(img, verbosity, **kwargs) -> np.ndarray:
     """
     Routine to detect markers as continous regions, based on thresholding gradients.
@@ -264,13 +439,31 @@ def _detect_markers_from_gradient(img, verbosity, **kwargs) -> np.ndarray:
                 regions via gradients.
             "threshold" (float): threshold value marking regions as either
                 continuous or edge.
+            "markers downsampling factor" (float): factor by which the image is
+                downsampled before detecting markers, which are then upsampled to
+                the original size; default is 1, i.e., no downsampling.
+            "fast gradient" (bool): flag controlling whether the approximation
+                provided by _fast_gradient is used; default is False.
     """
+    # Downsample the image and the disk radius accordingly
+    markers_disk_radius = kwargs.get("markers disk radius")
+    downsampling_factor = kwargs.get("markers downsampling factor", 1)
+    shape = img.shape[:2]
+    if downsampling_factor != 1:
+        img = cv2.resize(
+            img,
+            None,
+            fx=1 / downsampling_factor,
+            fy=1 / downsampling_factor,
+            interpolation=cv2.INTER_AREA,
+        )
+        markers_disk_radius = max(round(markers_disk_radius / downsampling_factor), 1)
 
     # Find continuous region, i.e., areas with low local gradient
-    markers_disk_radius = kwargs.get("markers disk radius")
-    markers_basis = skimage.filters.rank.gradient(
-        img, skimage.morphology.disk(markers_disk_radius)
-    )
+    if kwargs.get("fast gradient", False):
+        markers_basis = _fast_gradient(img, markers_disk_radius)
+    else:
+        markers_basis = skimage.filters.rank.gradient(img, _disk(markers_disk_radius))
 
     # Apply thresholding - requires fine tuning
     threshold = kwargs.get("threshold")
@@ -279,6 +472,14 @@ def _detect_markers_from_gradient(img, verbosity, **kwargs) -> np.ndarray:
     # Label the marked regions
     labeled_markers = skimage.measure.label(markers)
 
+    # Upsample the labels to the original size
+    if downsampling_factor != 1:
+        labeled_markers = cv2.resize(
+            labeled_markers.astype(np.int32),
+            tuple(reversed(shape)),
+            interpolation=cv2.INTER_NEAREST,
+        )
+
     if verbosity:
         plt.figure("Basis for finding continuous regions")
         plt.imshow(markers_basis)
@@ -335,13 +536,16 @@ def _detect_edges_from_gradient(img, **kwargs) -> np.ndarray:
         img (np.ndarray): input image, basis for determining the gradient.
         keyword arguments (optional): tuning parameters for the watershed algorithm
             "gradient disk radius" (int): disk radius to define edges via gradients.
+            "fast gradient" (bool): flag controlling whether the approximation
+                provided by _fast_gradient is used; default is False.
     """
     gradient_disk_radius = kwargs.get("gradient disk radius", 2)
 
     # Find edges
-    edges = skimage.filters.rank.gradient(
-        img, skimage.morphology.disk(gradient_disk_radius)
-    )
+    if kwargs.get("fast gradient", False):
+        edges = _fast_gradient(img, gradient_disk_radius)
+    else:
+        edges = skimage.filters.rank.gradient(img, _disk(gradient_disk_radius))
 
     return edges
 
@@ -391,68 +595,103 @@ def _cleanup(labels: np.ndarray, **kwargs) -> np.ndarray:
         np.ndarray: cleaned segmentation.
     """
     # Monitor number of labels prior and after the cleanup.
-    num_labels_prior = np.unique(labels).shape[0]
+    pre_labels = np.unique(labels)
+    num_labels_prior = pre_labels.shape[0]
 
+    # NOTE: After the first reset, labels are consecutive and non-negative integers
+    # (which is preserved by all steps), such that the present labels can be
+    # determined without sorting.
     dilation_size = kwargs.get("dilation size", 0)
     boundary_size = kwargs.get("boundary size", 0)
-    labels = _reset_labels(labels)
-    labels = _dilate_by_size(labels, dilation_size, False)
-    labels = _reset_labels(labels)
-    labels = _fill_holes(labels)
-    labels = _reset_labels(labels)
-    labels = _dilate_by_size(labels, dilation_size, True)
-    labels = _reset_labels(labels)
+    labels = _reset_labels(labels, pre_labels)
+    labels = _dilate_by_size(labels, dilation_size, False, np.arange(num_labels_prior))
+    labels = _reset_labels(labels, _present_labels(labels))
+    labels = _fill_holes(labels, _present_labels(labels))
+    labels = _reset_labels(labels, _present_labels(labels))
+    labels = _dilate_by_size(labels, dilation_size, True, _present_labels(labels))
+    labels = _reset_labels(labels, _present_labels(labels))
     boundary: list[str] = kwargs.get("boundary", ["top", "left", "bottom", "right"])
     labels = _boundary(labels, boundary_size, boundary)
 
     # Inform the user if labels are removed - in particular, when using
     # markers_method = "supervised", this means that provided markers
     # are ignored.
-    num_labels_posterior = np.unique(labels).shape[0]
+    num_labels_posterior = _present_labels(labels).shape[0]
     if num_labels_prior != num_labels_posterior:
         warn("Cleanup in the segmentation has removed labels.")
 
     return labels
 
 
-def _reset_labels(labels: np.ndarray) -> np.ndarray:
+def _present_labels(labels: np.ndarray) -> np.ndarray:
+    """
+    Sorted labels present in a labeled image with non-negative integer labels.
+
+    Equivalent to np.unique(labels), but based on counting instead of sorting.
+
+    Args:
+        labels (np.ndarray): labeled image with non-negative integer labels
+
+    Returns:
+        np.ndarray: present labels
+    """
+    return np.flatnonzero(np.bincount(labels.ravel()))
+
+
+def _reset_labels(
+    labels: np.ndarray, pre_labels: Optional[np.ndarray] = None
+) -> np.ndarray:
     """
     Rename labels, such that these are consecutive with step size 1,
     starting from 0.
 
     Args:
         labels (np.ndarray): labeled image
+        pre_labels (np.ndarray, optional): sorted unique labels, if already known
 
     Returns:
         np.ndarray: new labeled regions
     """
-    pre_labels = np.unique(labels)
-    for i, label in enumerate(pre_labels):
-        mask = labels == label
-        labels[mask] = i
-    return labels
+    if pre_labels is None:
+        _, new_labels = np.unique(labels, return_inverse=True)
+    else:
+        new_labels = np.searchsorted(pre_labels, labels)
+    return new_labels.reshape(labels.shape).astype(labels.dtype, copy=False)
 
 
-def _fill_holes(labels: np.ndarray) -> np.ndarray:
+def _fill_holes(
+    labels: np.ndarray, pre_labels: Optional[np.ndarray] = None
+) -> np.ndarray:
     """
     Routine for filling holes in all labeled regions.
 
     Args:
         labels (np.ndarray): labeled image
+        pre_labels (np.ndarray, optional): sorted unique labels, if already known
 
     Returns:
         np.ndarray: labels without holes.
     """
-    pre_labels = np.unique(labels)
-    for label in pre_labels:
-        mask = labels == label
-        mask = ndi.binary_fill_holes(mask).astype(bool)
-        labels[mask] = label
+    # Holes of a label lie within its bounding box, and any region touching the
+    # boundary of the bounding box is connected to the image boundary. Thus, it is
+    # sufficient to fill holes within the bounding box of each label.
+    if pre_labels is None:
+        pre_labels, inverse = np.unique(labels, return_inverse=True)
+    else:
+        inverse = np.searchsorted(pre_labels, labels.ravel())
+    bounding_boxes = ndi.find_objects(inverse.reshape(labels.shape) + 1)
+    for label, bounding_box in zip(pre_labels, bounding_boxes):
+        labels_roi = labels[bounding_box]
+        mask = ndi.binary_fill_holes(labels_roi == label)
+        labels_roi[mask] = label
     return labels
 
 
 def _dilate_by_size(
-    labels: np.ndarray, footprint: Union[np.ndarray, int], decreasing_order: bool
+    labels: np.ndarray,
+    footprint: Union[np.ndarray, int],
+    decreasing_order: bool,
+    pre_labels: Optional[np.ndarray] = None,
 ) -> np.ndarray:
     """
     Dilate objects by prescribed size.
@@ -463,28 +702,72 @@ def _dilate_by_size(
         descreasing_order (bool): flag controlling whether dilation
             should be performed on objects with decreasing order
             or not (increasing order then).
+        pre_labels (np.ndarray, optional): sorted unique labels, if already known
 
     Returns:
         np.ndarray: labels after dilation
     """
     if footprint != 0:
-        # Determine sizes of all marked areas
-        pre_labels = np.unique(labels)
-        sizes = [np.count_nonzero(labels == label) for label in pre_labels]
+        # Determine sizes and bounding boxes of all marked areas
+        if pre_labels is None:
+            pre_labels, inverse = np.unique(labels, return_inverse=True)
+            # NOTE: The shape of the inverse depends on the numpy version.
+            inverse = inverse.ravel()
+        else:
+            inverse = np.searchsorted(pre_labels, labels.ravel())
+        sizes = np.bincount(inverse)
+        bounding_boxes = ndi.find_objects(inverse.reshape(labels.shape) + 1)
         # Sort from small to large
         labels_sorted_sizes = np.argsort(sizes)
         if decreasing_order:
             labels_sorted_sizes = np.flip(labels_sorted_sizes)
-        # Erode for each label if still existent
+        # Erode for each label if still existent - restricted to the bounding box
+        # of the label, extended by the size of the footprint
+        offsets = np.argwhere(_disk(footprint)) - footprint
         for label in labels_sorted_sizes:
-            mask = labels == label
-            mask = skimage.morphology.binary_dilation(
-                mask, skimage.morphology.disk(footprint)
+            index = np.searchsorted(pre_labels, label)
+            if index == len(pre_labels) or pre_labels[index] != label:
+                continue
+            roi = tuple(
+                slice(max(sl.start - footprint, 0), min(sl.stop + footprint, n))
+                for sl, n in zip(bounding_boxes[index], labels.shape)
             )
-            labels[mask] = label
+            _dilate_label(labels[roi], label, offsets)
     return labels
 
 
+@numba.njit(parallel=True, fastmath=True, cache=True)
+def _dilate_label(labels: np.ndarray, label: int, offsets: np.ndarray) -> None:
+    """Numba kernel for the dilation of a single label in a 2d labeled image.
+
+    Equivalent to labels[binary_dilation(labels == label, footprint)] = label, but
+    performed by scattering the footprint around each pixel of the label in a
+    parallel sweep over the rows. Thus, the cost scales with the size of the label
+    instead of the size of the image times the size of the footprint.
+
+    Args:
+        labels (np.ndarray): labeled image, modified in-place
+        label (int): label to be dilated
+        offsets (np.ndarray): offsets of the footprint relative to its center,
+            of shape (num_offsets, 2)
+
+    """
+    rows, cols = labels.shape
+    mask = np.zeros((rows, cols), dtype=np.bool_)
+    for i in numba.prange(rows):
+        for j in range(cols):
+            if labels[i, j] == label:
+                for k in range(offsets.shape[0]):
+                    ii = i + offsets[k, 0]
+                    jj = j + offsets[k, 1]
+                    if 0 <= ii < rows and 0 <= jj < cols:
+                        mask[ii, jj] = True
+    for i in numba.prange(rows):
+        for j in range(cols):
+            if mask[i, j]:
+                labels[i, j] = label
+
+
 def _boundary(labels: np.ndarray, thickness: int, boundary: list[str]) -> np.ndarray:
     """
     Constant extenion in normal direction at the boundary of labeled image.
@@ -65,3 +65,56 @@ def test_superposition_2d_spacetime():
     superposed_meta = superposed_image.metadata()
     for key, value in meta.items():
         assert np.allclose(value, superposed_meta[key])
+
+
+def test_float_weight_integer_image_2d():
+
+    image = darsia.Image(np.ones((3, 4), dtype=np.uint8), space_dim=2)
+    weight = darsia.Image(0.5 * np.ones((3, 4)), space_dim=2)
+    weighted_image = darsia.weight(image, weight)
+    assert np.allclose(weighted_image.img, 0.5 * np.ones((3, 4)))
+    assert np.allclose(image.img, 1)
+
+
+def test_float_array_weight_integer_image_2d():
+
+    image = darsia.Image(np.ones((3, 4, 3), dtype=np.uint8), space_dim=2)
+    weight = np.array([0.5, 1, 2])
+    weighted_image = darsia.weight(image, weight)
+    assert np.allclose(weighted_image.img, np.broadcast_to(weight, (3, 4, 3)))
+
+
+def test_superposition_2d_incompatible_coordinatesystems():
+
+    images = [
+        darsia.ScalarImage(
+            np.random.rand(6, 8), space_dim=2, dimensions=[3, 4], origin=[0, 3]
+        ),
+        darsia.ScalarImage(
+            np.random.rand(4, 10), space_dim=2, dimensions=[2, 5], origin=[1, 3.5]
+        ),
+    ]
+    superposed_image = darsia.superpose(images)
+    assert superposed_image.img.dtype == np.float64
+
+    # Reference: warp each image separately (in float32) and sum up
+    reference = np.zeros_like(superposed_image.img)
+    for image in images:
+        voxel_origin = superposed_image.coordinatesystem.voxel(image.origin)
+        voxel_corner = superposed_image.coordinatesystem.voxel(image.opposite_corner)
+        rows, cols = image.img.shape
+        reference += darsia.extract_quadrilateral_ROI(
+            img_src=image.img,
+            pts_src=darsia.make_voxel([[0, 0], [rows, 0], [rows, cols], [0, cols]]),
+            pts_dst=darsia.make_voxel(
+                [
+                    [voxel_origin[0], voxel_origin[1]],
+                    [voxel_corner[0], voxel_origin[1]],
+                    [voxel_corner[0], voxel_corner[1]],
+                    [voxel_origin[0], voxel_corner[1]],
+                ]
+            ),
+            interpolation="inter_area",
+            shape=superposed_image.img.shape,
+        )
+    assert np.allclose(superposed_image.img, reference, atol=1e-6)
@@ -8,6 +8,7 @@ import pytest
 import skimage
 
 import darsia
+from darsia.corrections.color.illuminationcorrection import _apply_scaling
 
 
 def read_test_image(img_id: str) -> tuple[np.ndarray, dict]:
@@ -244,3 +245,121 @@ def test_rotation():
     )
 
     assert np.allclose(image.img, image_ref)
+
+
+# ! ---- Illumination correction
+
+# Three samples determine the linear interpolation of the scaling uniquely; the last
+# sample is used as reference.
+illumination_samples = [
+    (slice(5, 10), slice(5, 10)),
+    (slice(5, 10), slice(45, 50)),
+    (slice(30, 35), slice(20, 25)),
+]
+
+
+def illumination_base_image(colors: np.ndarray) -> darsia.OpticalImage:
+    """Image with constant colors in the illumination samples."""
+
+    array = np.zeros((40, 60, 3))
+    for sample, color in zip(illumination_samples, colors):
+        array[sample] = color
+    return darsia.OpticalImage(array, width=6, height=4, color_space="RGB")
+
+
+@pytest.mark.parametrize(
+    "colorspace, expected_scaling",
+    [
+        ("rgb-scalar", [[2.0], [21 / 19], [1.0]]),
+        ("rgb", [[2.0, 2.0, 2.0], [1.0, 2.0, 1.0], [1.0, 1.0, 1.0]]),
+    ],
+)
+def test_illumination_correction_scaling(colorspace, expected_scaling):
+    """Test the least-squares scaling for a scalar and a trichromatic colorspace."""
+
+    colors = np.array([[0.25, 0.2, 0.15], [0.5, 0.2, 0.3], [0.5, 0.4, 0.3]])
+    base = illumination_base_image(colors)
+    illumination_correction = darsia.IlluminationCorrection()
+    illumination_correction.setup(
+        base, illumination_samples, colorspace=colorspace, interpolation="linear"
+    )
+
+    # The (linear) interpolation reproduces the scaling in the samples
+    for sample, expected in zip(illumination_samples, expected_scaling):
+        voxel = (sample[0].start, sample[1].start)
+        scaling = [
+            local_scaling.img[voxel]
+            for local_scaling in illumination_correction.local_scaling
+        ]
+        assert np.allclose(scaling, expected, atol=1e-6)
+
+
+def test_illumination_correction_save_load(tmp_path):
+    """Test storing and loading illumination corrections, incl. the legacy format."""
+
+    colors = np.array([[0.25, 0.2, 0.15], [0.5, 0.2, 0.3], [0.5, 0.4, 0.3]])
+    base = illumination_base_image(colors)
+    illumination_correction = darsia.IlluminationCorrection()
+    illumination_correction.setup(
+        base, illumination_samples, colorspace="rgb", interpolation="linear"
+    )
+    image = darsia.OpticalImage(np.random.rand(40, 60, 3), width=6, height=4)
+    corrected_image = illumination_correction(image)
+
+    # Round trip of the current format
+    path = tmp_path / "illumination_correction.npz"
+    illumination_correction.save(path)
+    loaded_correction = darsia.IlluminationCorrection()
+    loaded_correction.load(path)
+    assert loaded_correction.colorspace == "rgb"
+    for local_scaling, loaded_local_scaling in zip(
+        illumination_correction.local_scaling, loaded_correction.local_scaling
+    ):
+        assert np.allclose(local_scaling.img, loaded_local_scaling.img)
+        assert np.allclose(local_scaling.origin, loaded_local_scaling.origin)
+        assert np.allclose(local_scaling.dimensions, loaded_local_scaling.dimensions)
+    assert np.allclose(loaded_correction(image).img, corrected_image.img)
+
+    # Legacy format, storing the images as pickled objects
+    legacy_path = tmp_path / "legacy_illumination_correction.npz"
+    np.savez(
+        legacy_path,
+        config={
+            "colorspace": illumination_correction.colorspace,
+            "local_scaling": illumination_correction.local_scaling,
+        },
+    )
+    legacy_correction = darsia.IlluminationCorrection()
+    legacy_correction.load(legacy_path)
+    assert legacy_correction.colorspace == "rgb"
+    assert np.allclose(legacy_correction(image).img, corrected_image.img)
+
+
+def test_illumination_correction_identity():
+    """Test that a trivial scaling returns the input unchanged."""
+
+    # All samples share the same color, such that no scaling is required
+    colors = np.tile([0.5, 0.4, 0.3], (3, 1))
+    base = illumination_base_image(colors)
+    illumination_correction = darsia.IlluminationCorrection()
+    illumination_correction.setup(
+        base, illumination_samples, colorspace="rgb", interpolation="linear"
+    )
+
+    img = np.random.rand(40, 60, 3)
+    assert illumination_correction.correct_array(img) is img
+    space_time_img = np.random.rand(40, 60, 2, 3)
+    assert (
+        illumination_correction.correct_array_series(space_time_img) is space_time_img
+    )
+
+
+@pytest.mark.parametrize("num_components", [1, 3])
+def test_illumination_correction_apply_scaling(num_components):
+    """Test the numba kernel for scaling color images against numpy."""
+
+    img = np.random.rand(40, 60, 3).astype(np.float32)
+    scaling = np.random.rand(40, 60, num_components).astype(np.float32)
+    out = np.empty_like(img)
+    _apply_scaling(img, scaling, out)
+    assert np.allclose(out, np.multiply(img, scaling))
@@ -1,200 +1,266 @@
 """Unit tests for finite volume utilities."""
 
+from functools import lru_cache
+
 import numpy as np
+import pytest
+import scipy.sparse as sps
 
 import darsia
 
+# ! ---- Grids and operators shared across tests
 
-def test_divergence_2d():
-    # Create divergence matrix
-    grid = darsia.Grid(shape=(4, 5), voxel_size=[0.5, 0.25])
-    divergence = darsia.FVDivergence(grid).mat.todense()
 
-    # Check shape
-    assert np.allclose(divergence.shape, (grid.num_cells, grid.num_faces))
+@lru_cache(maxsize=None)
+def _divergence(shape: tuple[int, ...], voxel_size: tuple[float, ...]):
+    """Divergence matrix in CSR format, cached by grid shape and voxel size."""
+    grid = darsia.Grid(shape=shape, voxel_size=list(voxel_size))
+    return darsia.FVDivergence(grid).mat.tocsr()
 
-    # Check values in corner cells
-    assert np.allclose(np.nonzero(divergence[0])[1], [0, 15])
-    assert np.allclose(divergence[0, np.array([0, 15])], [0.25, 0.5])
 
-    assert np.allclose(np.nonzero(divergence[4])[1], [3, 15, 19])
-    assert np.allclose(divergence[4, np.array([3, 15, 19])], [0.25, -0.5, 0.5])
+@pytest.fixture(scope="module")
+def grid_2x3():
+    return darsia.Grid(shape=(2, 3), voxel_size=[0.5, 0.25])
 
-    assert np.allclose(np.nonzero(divergence[16])[1], [12, 27])
-    assert np.allclose(divergence[16, np.array([12, 27])], [0.25, -0.5])
 
-    assert np.allclose(np.nonzero(divergence[19])[1], [14, 30])
-    assert np.allclose(divergence[19, np.array([14, 30])], [-0.25, -0.5])
+@pytest.fixture(scope="module")
+def grid_3x4():
+    return darsia.Grid(shape=(3, 4), voxel_size=[0.5, 0.25])
 
-    # Check value for interior cell
-    assert np.allclose(np.nonzero(divergence[6])[1], [4, 5, 17, 21])
-    assert np.allclose(
-        divergence[6, np.array([4, 5, 17, 21])], [-0.25, 0.25, -0.5, 0.5]
-    )
+
+@pytest.fixture(scope="module")
+def grid_4x5():
+    return darsia.Grid(shape=(4, 5), voxel_size=[0.5, 0.25])
+
+
+@pytest.fixture(scope="module")
+def grid_3x3x3():
+    return darsia.Grid(shape=(3, 3, 3), voxel_size=[0.5, 0.25, 2])
+
+
+@pytest.fixture(scope="module")
+def grid_3x4x5():
+    return darsia.Grid(shape=(3, 4, 5), voxel_size=[0.5, 0.25, 2])
+
+
+@pytest.fixture(scope="module")
+def divergence_2d():
+    return _divergence((4, 5), (0.5, 0.25))
+
+
+@pytest.fixture(scope="module")
+def divergence_3d():
+    return _divergence((3, 4, 5), (0.5, 0.25, 2))
 
 
-def test_divergence_3d():
-    # Create divergence matrix
-    grid = darsia.Grid(shape=(3, 4, 5), voxel_size=[0.5, 0.25, 2])
-    divergence = darsia.FVDivergence(grid).mat.todense()
+@pytest.fixture(scope="module")
+def flat_flux_3x4(grid_3x4):
+    return np.arange(grid_3x4.num_faces)
 
+
+@pytest.fixture(scope="module")
+def flat_flux_3x3x3(grid_3x3x3):
+    return np.arange(grid_3x3x3.num_faces)
+
+
+@pytest.fixture(scope="module")
+def flat_flux_3x4x5(grid_3x4x5):
+    return np.arange(grid_3x4x5.num_faces)
+
+
+@pytest.fixture(scope="module")
+def full_flux_2d(grid_3x4, flat_flux_3x4):
+    return darsia.FVFullFaceReconstruction(grid_3x4)(flat_flux_3x4)
+
+
+@pytest.fixture(scope="module")
+def full_flux_3d(grid_3x3x3, flat_flux_3x3x3):
+    return darsia.FVFullFaceReconstruction(grid_3x3x3)(flat_flux_3x3x3)
+
+
+def _row_nonzeros(mat, row: int) -> tuple[np.ndarray, np.ndarray]:
+    """Column indices and values of the nonzero entries of a row of a CSR matrix."""
+    start, end = mat.indptr[row], mat.indptr[row + 1]
+    order = np.argsort(mat.indices[start:end])
+    return mat.indices[start:end][order], mat.data[start:end][order]
+
+
+def _dense_row(mat, row: int) -> np.ndarray:
+    """Dense copy of a single row of a CSR matrix."""
+    start, end = mat.indptr[row], mat.indptr[row + 1]
+    dense = np.zeros(mat.shape[1], dtype=mat.dtype)
+    dense[mat.indices[start:end]] = mat.data[start:end]
+    return dense
+
+
+def test_divergence_2d(grid_4x5, divergence_2d):
+    # Check shape
+    assert divergence_2d.shape == (grid_4x5.num_cells, grid_4x5.num_faces)
+
+
+@pytest.mark.parametrize(
+    "row, expected_cols, expected_vals",
+    [
+        # Corner cells
+        (0, [0, 15], [0.25, 0.5]),
+        (4, [3, 15, 19], [0.25, -0.5, 0.5]),
+        (16, [12, 27], [0.25, -0.5]),
+        (19, [14, 30], [-0.25, -0.5]),
+        # Interior cell
+        (6, [4, 5, 17, 21], [-0.25, 0.25, -0.5, 0.5]),
+    ],
+)
+def test_divergence_2d_row(divergence_2d, row, expected_cols, expected_vals):
+    cols, vals = _row_nonzeros(divergence_2d, row)
+    assert np.array_equal(cols, expected_cols)
+    assert np.allclose(vals, expected_vals)
+
+
+def test_divergence_3d(grid_3x4x5, divergence_3d):
     # Check shape
-    assert np.allclose(divergence.shape, (grid.num_cells, grid.num_faces))
+    assert divergence_3d.shape == (grid_3x4x5.num_cells, grid_3x4x5.num_faces)
 
     # Check values in corner cells
-    assert np.allclose(np.nonzero(divergence[0])[1], [0, 40, 85])
-    assert np.allclose(divergence[0, np.array([0, 40, 85])], [0.5, 1, 0.125])
+    cols, vals = _row_nonzeros(divergence_3d, 0)
+    assert np.allclose(cols, [0, 40, 85])
+    assert np.allclose(vals, [0.5, 1, 0.125])
 
-    assert np.allclose(np.nonzero(divergence[11])[1], [7, 48, 96])
-    assert np.allclose(divergence[11, np.array([7, 48, 96])], [-0.5, -1, 0.125])
+    cols, vals = _row_nonzeros(divergence_3d, 11)
+    assert np.allclose(cols, [7, 48, 96])
+    assert np.allclose(vals, [-0.5, -1, 0.125])
 
-    assert np.allclose(np.nonzero(divergence[59])[1], [39, 84, 132])
-    assert np.allclose(divergence[59, np.array([39, 84, 132])], [-0.5, -1, -0.125])
+    cols, vals = _row_nonzeros(divergence_3d, 59)
+    assert np.allclose(cols, [39, 84, 132])
+    assert np.allclose(vals, [-0.5, -1, -0.125])
 
     # Check value for interior cell
-    assert np.allclose(np.nonzero(divergence[16])[1], [10, 11, 50, 53, 89, 101])
-    assert np.allclose(
-        divergence[16, np.array([10, 11, 50, 53, 89, 101])],
-        [-0.5, 0.5, -1, 1, -0.125, 0.125],
-    )
+    cols, vals = _row_nonzeros(divergence_3d, 16)
+    assert np.allclose(cols, [10, 11, 50, 53, 89, 101])
+    assert np.allclose(vals, [-0.5, 0.5, -1, 1, -0.125, 0.125])
 
 
-def test_mass_2d():
-    grid = darsia.Grid(shape=(4, 5), voxel_size=[0.5, 0.25])
-    mass = darsia.FVMass(grid).mat.todense()
+def test_mass_2d(grid_4x5):
+    mass = darsia.FVMass(grid_4x5).mat.tocsr()
 
     # Check shape
-    assert np.allclose(mass.shape, (grid.num_cells, grid.num_cells))
+    assert mass.shape == (grid_4x5.num_cells, grid_4x5.num_cells)
 
     # Check diagonal structure
-    assert np.linalg.norm(mass - np.diag(np.diag(mass))) < 1e-10
+    diagonal = mass.diagonal()
+    assert sps.linalg.norm(mass - sps.diags(diagonal)) < 1e-10
 
     # Check diagonal values
-    assert len(np.unique(np.diag(mass))) == 1
-    assert np.isclose(mass[0, 0], 0.125)
+    assert diagonal.max() - diagonal.min() < 1e-12
+    assert np.isclose(diagonal[0], 0.125)
 
 
-def test_mass_3d():
-    grid = darsia.Grid(shape=(3, 4, 5), voxel_size=[0.5, 0.25, 2])
-    mass = darsia.FVMass(grid).mat.todense()
+def test_mass_3d(grid_3x4x5):
+    mass = darsia.FVMass(grid_3x4x5).mat.tocsr()
 
     # Check shape
-    assert np.allclose(mass.shape, (grid.num_cells, grid.num_cells))
+    assert mass.shape == (grid_3x4x5.num_cells, grid_3x4x5.num_cells)
 
     # Check diagonal structure
-    assert np.linalg.norm(mass - np.diag(np.diag(mass))) < 1e-10
+    diagonal = mass.diagonal()
+    assert sps.linalg.norm(mass - sps.diags(diagonal)) < 1e-10
 
     # Check diagonal values
-    assert len(np.unique(np.diag(mass))) == 1
-    assert np.isclose(mass[0, 0], 0.25)
+    assert diagonal.max() - diagonal.min() < 1e-12
+    assert np.isclose(diagonal[0], 0.25)
 
 
-def test_mass_face_2d():
-    grid = darsia.Grid(shape=(4, 5), voxel_size=[0.5, 0.25])
-    mass = darsia.FVMass(grid, mode="faces", lumping=True).mat.todense()
+def test_mass_face_2d(grid_4x5):
+    mass = darsia.FVMass(grid_4x5, mode="faces", lumping=True).mat.tocsr()
 
     # Check shape
-    assert np.allclose(mass.shape, (grid.num_faces, grid.num_faces))
+    assert mass.shape == (grid_4x5.num_faces, grid_4x5.num_faces)
 
     # Check diagonal structure
-    assert np.linalg.norm(mass - np.diag(np.diag(mass))) < 1e-10
+    diagonal = mass.diagonal()
+    assert sps.linalg.norm(mass - sps.diags(diagonal)) < 1e-10
 
     # Check diagonal values
-    assert len(np.unique(np.diag(mass))) == 1
-    assert np.isclose(mass[0, 0], 0.5 * 0.125)
+    assert diagonal.max() - diagonal.min() < 1e-12
+    assert np.isclose(diagonal[0], 0.5 * 0.125)
 
 
-def test_mass_face_3d():
-    grid = darsia.Grid(shape=(3, 4, 5), voxel_size=[0.5, 0.25, 2])
-    mass = darsia.FVMass(grid, mode="faces", lumping=True).mat.todense()
+def test_mass_face_3d(grid_3x4x5):
+    mass = darsia.FVMass(grid_3x4x5, mode="faces", lumping=True).mat.tocsr()
 
     # Check shape
-    assert np.allclose(mass.shape, (grid.num_faces, grid.num_faces))
+    assert mass.shape == (grid_3x4x5.num_faces, grid_3x4x5.num_faces)
 
     # Check diagonal structure
-    assert np.linalg.norm(mass - np.diag(np.diag(mass))) < 1e-10
+    diagonal = mass.diagonal()
+    assert sps.linalg.norm(mass - sps.diags(diagonal)) < 1e-10
 
     # Check diagonal values
-    assert len(np.unique(np.diag(mass))) == 1
-    assert np.isclose(mass[0, 0], 0.5 * 0.25)
+    assert diagonal.max() - diagonal.min() < 1e-12
+    assert np.isclose(diagonal[0], 0.5 * 0.25)
 
 
-def test_tangential_reconstruction_2d_1():
-    grid = darsia.Grid(shape=(2, 3), voxel_size=[0.5, 0.25])
+def test_tangential_reconstruction_2d_1(grid_2x3):
     tangential_reconstruction = (
-        darsia.FVTangentialFaceReconstruction(grid).mat[0].todense()
+        darsia.FVTangentialFaceReconstruction(grid_2x3).mat[0].tocsr()
     )
 
     # Check shape
-    assert np.allclose(
-        tangential_reconstruction.shape, (grid.num_faces, grid.num_faces)
-    )
+    assert tangential_reconstruction.shape == (grid_2x3.num_faces, grid_2x3.num_faces)
 
     # Check values - first for exterior faces
-    assert np.allclose(tangential_reconstruction[0], [0, 0, 0, 0.25, 0.25, 0, 0])
-    assert np.allclose(tangential_reconstruction[4], [0.25, 0.25, 0, 0, 0, 0, 0])
+    assert np.allclose(
+        _dense_row(tangential_reconstruction, 0), [0, 0, 0, 0.25, 0.25, 0, 0]
+    )
+    assert np.allclose(
+        _dense_row(tangential_reconstruction, 4), [0.25, 0.25, 0, 0, 0, 0, 0]
+    )
 
     # Check values - then for interior faces
-    assert np.allclose(tangential_reconstruction[1], [0, 0, 0, 0.25, 0.25, 0.25, 0.25])
+    assert np.allclose(
+        _dense_row(tangential_reconstruction, 1), [0, 0, 0, 0.25, 0.25, 0.25, 0.25]
+    )
 
 
-def test_tangential_reconstruction_2d_2():
-    grid = darsia.Grid(shape=(3, 4), voxel_size=[0.5, 0.25])
-    tangential_reconstruction_dense = (
-        darsia.FVTangentialFaceReconstruction(grid).mat[0].todense()
-    )
+def test_tangential_reconstruction_2d_2(grid_3x4, flat_flux_3x4):
+    tangential_reconstruction = darsia.FVTangentialFaceReconstruction(grid_3x4)
+    mat = tangential_reconstruction.mat[0].tocsr()
 
     # Check shape
-    assert np.allclose(
-        tangential_reconstruction_dense.shape, (grid.num_faces, grid.num_faces)
-    )
+    assert mat.shape == (grid_3x4.num_faces, grid_3x4.num_faces)
 
     # Check values - first for exterior faces
-    assert np.allclose(np.nonzero(tangential_reconstruction_dense[0])[1], [8, 9])
-    assert np.allclose(np.nonzero(tangential_reconstruction_dense[7])[1], [15, 16])
+    assert np.allclose(_row_nonzeros(mat, 0)[0], [8, 9])
+    assert np.allclose(_row_nonzeros(mat, 7)[0], [15, 16])
 
     # Check values - then for interior faces
-    assert np.allclose(
-        np.nonzero(tangential_reconstruction_dense[2])[1], [8, 9, 11, 12]
-    )
-    assert np.allclose(np.nonzero(tangential_reconstruction_dense[15])[1], [4, 5, 6, 7])
+    assert np.allclose(_row_nonzeros(mat, 2)[0], [8, 9, 11, 12])
+    assert np.allclose(_row_nonzeros(mat, 15)[0], [4, 5, 6, 7])
 
     # Apply once and prove values
-    tangential_reconstruction = darsia.FVTangentialFaceReconstruction(grid)
-    normal_flux = np.arange(grid.num_faces)
-    tangential_flux = tangential_reconstruction(normal_flux)
+    tangential_flux = tangential_reconstruction(flat_flux_3x4)
     assert np.allclose(
-        tangential_flux[np.array([0, 1, 4, 8, 12, 16])], [4.25, 4.75, 13, 0.5, 3.5, 3]
+        np.take(tangential_flux, [0, 1, 4, 8, 12, 16]), [4.25, 4.75, 13, 0.5, 3.5, 3]
     )
 
 
-def test_full_reconstruction_2d_2():
-    grid = darsia.Grid(shape=(3, 4), voxel_size=[0.5, 0.25])
-
-    # Apply once and prove values
-    tangential_reconstruction = darsia.FVFullFaceReconstruction(grid)
-    normal_flux = np.arange(grid.num_faces)
-    full_flux = tangential_reconstruction(normal_flux)
-
+def test_full_reconstruction_2d_2(grid_3x4, full_flux_2d):
     # Check shape
-    assert np.allclose(full_flux.shape, (grid.num_faces, 2))
+    assert full_flux_2d.shape == (grid_3x4.num_faces, 2)
 
     # Check values
-    assert np.allclose(full_flux[0], [0, 4.25])
-    assert np.allclose(full_flux[1], [1, 4.75])
-    assert np.allclose(full_flux[4], [4, 13])
-    assert np.allclose(full_flux[8], [0.5, 8])
-    assert np.allclose(full_flux[12], [3.5, 12])
-    assert np.allclose(full_flux[16], [3, 16])
+    assert np.allclose(full_flux_2d[0], [0, 4.25])
+    assert np.allclose(full_flux_2d[1], [1, 4.75])
+    assert np.allclose(full_flux_2d[4], [4, 13])
+    assert np.allclose(full_flux_2d[8], [0.5, 8])
+    assert np.allclose(full_flux_2d[12], [3.5, 12])
+    assert np.allclose(full_flux_2d[16], [3, 16])
 
 
-def test_tangential_reconstruction_3d():
-    grid = darsia.Grid(shape=(3, 3, 3), voxel_size=[0.5, 0.25, 2])
-    tangential_reconstruction = darsia.FVTangentialFaceReconstruction(grid)
+def test_tangential_reconstruction_3d(grid_3x3x3, flat_flux_3x3x3):
+    tangential_reconstruction = darsia.FVTangentialFaceReconstruction(grid_3x3x3)
 
     # Apply once and probe values
-    normal_flux = np.arange(grid.num_faces)
-    tangential_flux = tangential_reconstruction(normal_flux, concatenate=False)
+    tangential_flux = tangential_reconstruction(flat_flux_3x3x3, concatenate=False)
 
     # Corner block
     assert np.allclose(
@@ -222,57 +288,41 @@ def test_tangential_reconstruction_3d():
     )
 
 
-def test_full_reconstruction_3d():
-    grid = darsia.Grid(shape=(3, 3, 3), voxel_size=[0.5, 0.25, 2])
-    full_reconstuction = darsia.FVFullFaceReconstruction(grid)
-
-    # Apply once and probe values
-    normal_flux = np.arange(grid.num_faces)
-    full_flux = full_reconstuction(normal_flux)
-
-    # Corner block
-    assert np.allclose(full_flux[0], [0, (18 + 19) / 4, (36 + 37) / 4])
-    assert np.allclose(full_flux[18], [(0 + 2) / 4, 18, (36 + 39) / 4])
-    assert np.allclose(full_flux[36], [(0 + 6) / 4, (18 + 24) / 4, 36])
-
-    # Center block
-    assert np.allclose(
-        full_flux[8], [8, (24 + 25 + 27 + 28) / 4, (39 + 40 + 48 + 49) / 4]
-    )
-    assert np.allclose(
-        full_flux[25], [(6 + 7 + 8 + 9) / 4, 25, (37 + 40 + 46 + 49) / 4]
-    )
-    assert np.allclose(
-        full_flux[40], [(2 + 3 + 8 + 9) / 4, (19 + 22 + 25 + 28) / 4, 40]
+def test_full_reconstruction_3d(full_flux_3d):
+    # Probe corner block (first three) and center block (last three)
+    probes = np.array([0, 18, 36, 8, 25, 40])
+    expected = np.array(
+        [
+            [0, (18 + 19) / 4, (36 + 37) / 4],
+            [(0 + 2) / 4, 18, (36 + 39) / 4],
+            [(0 + 6) / 4, (18 + 24) / 4, 36],
+            [8, (24 + 25 + 27 + 28) / 4, (39 + 40 + 48 + 49) / 4],
+            [(6 + 7 + 8 + 9) / 4, 25, (37 + 40 + 46 + 49) / 4],
+            [(2 + 3 + 8 + 9) / 4, (19 + 22 + 25 + 28) / 4, 40],
+        ]
     )
+    assert np.allclose(full_flux_3d[probes], expected)
 
 
-def test_face_to_cell_2d():
-    grid = darsia.Grid(shape=(3, 4), voxel_size=[0.5, 0.25])
-    num_faces = grid.num_faces
-    flat_flux = np.arange(num_faces)
-    cell_flux = darsia.face_to_cell(grid, flat_flux)
+def test_face_to_cell_2d(grid_3x4, flat_flux_3x4):
+    cell_flux = darsia.face_to_cell(grid_3x4, flat_flux_3x4)
 
     # Check shape
-    assert np.allclose(cell_flux.shape, (*grid.shape, grid.dim))
+    assert cell_flux.shape == (*grid_3x4.shape, grid_3x4.dim)
 
     # Check values
-    print(cell_flux)
     assert np.allclose(cell_flux[0, 0], [0, 4])
     assert np.allclose(cell_flux[2, 3], [3.5, 8])
     assert np.allclose(cell_flux[1, 1], [2.5, 10.5])
 
 
-def test_face_to_cell_3d():
-    grid = darsia.Grid(shape=(3, 4, 5), voxel_size=[0.5, 0.25, 2])
-    num_faces = grid.num_faces
-    flat_flux = np.arange(num_faces)
-    cell_flux = darsia.face_to_cell(grid, flat_flux)
+def test_face_to_cell_3d(grid_3x4x5, flat_flux_3x4x5):
+    cell_flux = darsia.face_to_cell(grid_3x4x5, flat_flux_3x4x5)
 
     # Check shape
-    assert np.allclose(cell_flux.shape, (*grid.shape, grid.dim))
+    assert cell_flux.shape == (*grid_3x4x5.shape, grid_3x4x5.dim)
 
     # Check values
-    assert np.allclose(cell_flux[0, 0, 0], [0, 20, 42.5])
-    assert np.allclose(cell_flux[2, 3, 4], [19.5, 42, 66])
-    assert np.allclose(cell_flux[1, 1, 1], [10.5, 51.5, 95])
+    probes = np.array([[0, 0, 0], [2, 3, 4], [1, 1, 1]])
+    expected = np.array([[0, 20, 42.5], [19.5, 42, 66], [10.5, 51.5, 95]])
+    assert np.allclose(cell_flux[tuple(probes.T)], expected)
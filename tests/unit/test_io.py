@@ -1,12 +1,18 @@
 """Test I/O capabilities in darsia."""
 
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Optional
 
 import cv2
 import numpy as np
+import pydicom
 import pytest
+from PIL import Image as PIL_Image
+from PIL import TiffImagePlugin
 
 import darsia
+import darsia.image.imread as darsia_imread
 
 
 def test_imread_from_numpy():
@@ -59,6 +65,78 @@ def test_imread_from_bytes(shape):
     path.unlink()
 
 
+@pytest.mark.parametrize("shape", [(10, 20, 3), (10, 20)])
+def test_imread_from_bytes_array(shape):
+    """Test that encoded images are decoded identically from bytes and arrays."""
+
+    array = (np.random.rand(*shape) * 255).astype(np.uint8)
+    byte_str = cv2.imencode(".png", array)[1].tobytes()
+
+    # Read-only and writable arrays wrapping the same encoded image
+    buffers = [np.frombuffer(byte_str, dtype=np.uint8)]
+    buffers.append(buffers[0].copy())
+
+    bytes_image = darsia.imread_from_bytes(byte_str, dim=2, width=2, height=1)
+    for buffer in buffers:
+        array_image = darsia.imread_from_bytes(buffer, dim=2, width=2, height=1)
+        assert np.array_equal(array_image.img, bytes_image.img)
+
+        # The caller's buffer is not modified
+        assert buffer.tobytes() == byte_str
+
+
+def _write_exif_image(
+    path: Path,
+    date_time: Optional[str] = None,
+    date_time_original: Optional[str] = None,
+) -> None:
+    """Write a small image with DateTime and DateTimeOriginal exif tags, if provided."""
+
+    pil_img = PIL_Image.fromarray(np.zeros((4, 5, 3), dtype=np.uint8))
+    if date_time is None and date_time_original is None:
+        pil_img.save(path)
+    elif path.suffix == ".tif":
+        tiffinfo = TiffImagePlugin.ImageFileDirectory_v2()
+        if date_time is not None:
+            tiffinfo[0x0132] = date_time
+        if date_time_original is not None:
+            tiffinfo[0x8769] = {0x9003: date_time_original}
+        pil_img.save(path, tiffinfo=tiffinfo)
+    else:
+        exif = PIL_Image.Exif()
+        if date_time is not None:
+            exif[0x0132] = date_time
+        if date_time_original is not None:
+            exif.get_ifd(0x8769)[0x9003] = date_time_original
+        pil_img.save(path, exif=exif.tobytes())
+
+
+@pytest.mark.parametrize("suffix", [".jpg", ".tif", ".png"])
+@pytest.mark.parametrize(
+    "date_time, date_time_original, date",
+    [
+        ("2022:08:29 23:10:27", None, datetime(2022, 8, 29, 23, 10, 27)),
+        (None, "2021:01:02 03:04:05", datetime(2021, 1, 2, 3, 4, 5)),
+        (
+            "2022:08:29 23:10:27",
+            "2021:01:02 03:04:05",
+            datetime(2022, 8, 29, 23, 10, 27),
+        ),
+        (None, None, None),
+    ],
+)
+def test_read_exif_date(tmp_path, suffix, date_time, date_time_original, date):
+    """Test reading the date from exif metadata of JPEG, TIFF and PNG images."""
+
+    path = tmp_path / f"image{suffix}"
+    _write_exif_image(path, date_time, date_time_original)
+
+    # Read from file and from encoded file content
+    assert darsia_imread._read_exif_date(path) == date
+    assert darsia_imread._read_exif_date(np.fromfile(path, dtype=np.uint8)) == date
+    assert darsia.imread(path).date == date
+
+
 def test_imread_from_vtu():
     """Test imread for single and space-time vtu files."""
 
@@ -89,3 +167,277 @@ def test_imread_from_vtu():
 
     assert np.allclose(slice_0.img, vtu_image_2d.img)
     assert np.allclose(slice_1.img, vtu_image_2d.img)
+
+
+def test_imread_optical_series_dtype(tmp_path):
+    """Test reading a series of optical images with single precision."""
+
+    paths = [tmp_path / f"image_{i}.png" for i in range(2)]
+    for path in paths:
+        cv2.imwrite(str(path), (np.random.rand(10, 20, 3) * 255).astype(np.uint8))
+
+    image = darsia.imread(paths, time=[0, 1])
+    image_float32 = darsia.imread(paths, time=[0, 1], dtype=np.float32)
+
+    assert image.img.dtype == np.float64
+    assert image_float32.img.dtype == np.float32
+    assert image_float32.img.shape == (10, 20, 2, 3)
+    # Up to rounding in the conversion from ubyte to single precision
+    assert np.allclose(
+        image_float32.img, image.img.astype(np.float32), rtol=0, atol=1e-6
+    )
+
+
+def _write_dicom(
+    path: Path,
+    signal: np.ndarray,
+    position: list[float],
+    acquisition_time: str,
+    slope: float = 1.0,
+    intercept: float = 0.0,
+) -> None:
+    """Write a minimal single-slice DICOM file."""
+
+    file_meta = pydicom.dataset.FileMetaDataset()
+    file_meta.MediaStorageSOPClassUID = pydicom.uid.SecondaryCaptureImageStorage
+    file_meta.MediaStorageSOPInstanceUID = pydicom.uid.generate_uid()
+    file_meta.TransferSyntaxUID = pydicom.uid.ExplicitVRLittleEndian
+
+    dataset = pydicom.dataset.Dataset()
+    dataset.file_meta = file_meta
+    dataset.SOPClassUID = file_meta.MediaStorageSOPClassUID
+    dataset.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+    dataset.ImagePositionPatient = position
+    dataset.Rows, dataset.Columns = signal.shape
+    dataset.PixelSpacing = [0.5, 0.5]
+    dataset.SliceThickness = 2.0
+    dataset.AcquisitionDate = "20210222"
+    dataset.AcquisitionTime = acquisition_time
+    dataset.RescaleSlope = slope
+    dataset.RescaleIntercept = intercept
+    dataset.SamplesPerPixel = 1
+    dataset.PhotometricInterpretation = "MONOCHROME2"
+    dataset.BitsAllocated = 16
+    dataset.BitsStored = 16
+    dataset.HighBit = 15
+    dataset.PixelRepresentation = 0
+    dataset.PixelData = signal.astype(np.uint16).tobytes()
+    dataset.save_as(path, enforce_file_format=True)
+
+
+def test_imread_from_dicom_subsecond_times(tmp_path):
+    """Test that DICOM frames acquired within the same second are distinguished."""
+
+    # Two time frames of three slices each, acquired within the same second
+    signals = np.random.randint(0, 100, size=(2, 3, 4, 5))
+    paths = []
+    for t, acquisition_time in enumerate(["133538.25", "133538.5"]):
+        for k in range(3):
+            path = tmp_path / f"sample_{t}_{k}.dcm"
+            _write_dicom(path, signals[t, k], [0, 0, 2.0 * k], acquisition_time)
+            paths.append(path)
+
+    image = darsia.imread(paths, dim=3)
+
+    assert image.img.shape == (4, 5, 3, 2)
+    assert image.time_num == 2
+    assert image.date[1] - image.date[0] == timedelta(seconds=0.25)
+    assert np.allclose(image.img, np.moveaxis(signals, (0, 1), (3, 2)))
+
+
+def test_decoded_image_cache(tmp_path):
+    """Test cache hits and misses for decoded images, incl. invalidation."""
+
+    cache_dir = tmp_path / "cache"
+    path = tmp_path / "image.png"
+    array = (np.random.rand(10, 20, 3) * 255).astype(np.uint8)
+    cv2.imwrite(str(path), array)
+
+    # No caching without cache folder
+    darsia_imread._save_cached_array(path, None, array)
+    assert darsia_imread._load_cached_array(path, None) is None
+
+    # Miss before, hit after reading and decoding the image once
+    assert darsia_imread._load_cached_array(path, cache_dir) is None
+    image = darsia.imread(path, cache_dir=cache_dir)
+    assert darsia_imread._cache_path(path, cache_dir).exists()
+    cached_array = darsia_imread._load_cached_array(path, cache_dir)
+    assert np.array_equal(cached_array, cv2.cvtColor(array, cv2.COLOR_BGR2RGB))
+
+    # Reading through the cache returns the same image as without cache
+    assert np.allclose(darsia.imread(path, cache_dir=cache_dir).img, image.img)
+    assert np.allclose(darsia.imread(path).img, image.img)
+
+    # Modifying the source file invalidates the cache
+    cv2.imwrite(str(path), np.zeros((10, 21, 3), dtype=np.uint8))
+    assert darsia_imread._load_cached_array(path, cache_dir) is None
+    assert darsia.imread(path, cache_dir=cache_dir).img.shape[:2] == (10, 21)
+
+
+def test_decoded_image_cache_failed_write(tmp_path, monkeypatch):
+    """Test that no temporary files remain in the cache if writing fails."""
+
+    cache_dir = tmp_path / "cache"
+    path = tmp_path / "image.png"
+    array = (np.random.rand(10, 20, 3) * 255).astype(np.uint8)
+    cv2.imwrite(str(path), array)
+
+    def failing_save(*args, **kwargs):
+        raise OSError("Disk full.")
+
+    monkeypatch.setattr(darsia_imread.np, "save", failing_save)
+    with pytest.raises(OSError):
+        darsia_imread._save_cached_array(path, cache_dir, array)
+    assert list(cache_dir.iterdir()) == []
+
+
+def test_imread_from_dicom(tmp_path):
+    """Test imread for a DICOM series against reading and sorting sample by sample."""
+
+    # Shuffled samples of three time frames with four slices each, individually scaled
+    rng = np.random.default_rng(0)
+    samples = []
+    for acquisition_time in ["133538", "133540", "133539"]:
+        for k in rng.permutation(4):
+            samples.append(
+                (acquisition_time, k, rng.uniform(0.5, 2), rng.uniform(-1, 1))
+            )
+    paths = []
+    for i, (acquisition_time, k, slope, intercept) in enumerate(samples):
+        path = tmp_path / f"sample_{i}.dcm"
+        _write_dicom(
+            path,
+            rng.integers(0, 1000, size=(6, 5)),
+            [1.0, 2.0, 0.5 * k],
+            acquisition_time,
+            slope=slope,
+            intercept=intercept,
+        )
+        paths.append(path)
+
+    image = darsia.imread(paths, dim=3)
+
+    # Reference: read full samples one by one, rescale and sort by time and position
+    reference = np.zeros((6, 5, 4, 3))
+    times = sorted(set(acquisition_time for acquisition_time, *_ in samples))
+    for path in paths:
+        dataset = pydicom.dcmread(path)
+        signal = dataset.RescaleIntercept + dataset.RescaleSlope * dataset.pixel_array
+        k = int(round(dataset.ImagePositionPatient[2] / 0.5))
+        reference[:, :, k, times.index(dataset.AcquisitionTime)] = signal
+
+    assert image.img.shape == reference.shape
+    assert np.allclose(image.img, reference)
+    assert np.allclose(image.voxel_size, [0.5e-3, 0.5e-3, 2e-3])
+    assert [date.second for date in image.date] == [38, 39, 40]
+
+
+@pytest.mark.parametrize("copy_on_load", [False, True])
+def test_imread_from_numpy_copy_on_write(tmp_path, copy_on_load):
+    """Test that numpy images are writable without modifying the file on disk."""
+
+    path = tmp_path / "array.npy"
+    array = np.random.rand(10, 20)
+    np.save(path, array)
+
+    image = darsia.imread(path, dim=2, width=2, height=1, copy_on_load=copy_on_load)
+    assert isinstance(image.img, np.memmap) != copy_on_load
+    assert image.img.flags.writeable
+    image.img[:] = 0
+    assert np.allclose(image.img, 0)
+    assert np.allclose(np.load(path), array)
+
+
+def test_imread_from_numpy_rejects_pickle(tmp_path):
+    """Test that numpy object arrays, requiring pickling, are not read."""
+
+    path = tmp_path / "objects.npy"
+    np.save(path, np.array([{"a": 1}, None], dtype=object), allow_pickle=True)
+
+    with pytest.raises(ValueError):
+        darsia.imread(path, dim=2)
+
+
+def _unit_square_quad_mesh(n: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Quad mesh of the unit square with n x n cells and data 10 * i + j on each cell.
+
+    Here, i and j count the cells in x- and y-direction, respectively.
+
+    """
+
+    x, y = np.meshgrid(
+        np.linspace(0, 1, n + 1), np.linspace(0, 1, n + 1), indexing="ij"
+    )
+    points = np.column_stack((x.ravel(), y.ravel()))
+    i, j = np.meshgrid(np.arange(n), np.arange(n), indexing="ij")
+    i, j = i.ravel(), j.ravel()
+    corner = i * (n + 1) + j
+    cells = np.column_stack((corner, corner + n + 1, corner + n + 2, corner + 1))
+    data = (10 * i + j).astype(float)
+    return points, cells, data
+
+
+def test_resample_data_coarse_voxels():
+    """Test that voxels containing several cells carry the average of the cells."""
+
+    points, cells, data = _unit_square_quad_mesh(4)
+    meta = {"space_dim": 2, "indexing": "ij"}
+    pixelated_data = darsia_imread._resample_data(data, points, cells, (2, 2), meta)
+
+    # Rows in matrix indexing run against the y-direction
+    expected = np.array(
+        [
+            [np.mean([2, 3, 12, 13]), np.mean([22, 23, 32, 33])],
+            [np.mean([0, 1, 10, 11]), np.mean([20, 21, 30, 31])],
+        ]
+    )
+    assert np.allclose(pixelated_data, expected)
+
+
+def test_resample_data_fine_voxels():
+    """Test that empty voxels are filled with the value of the nearest filled voxel."""
+
+    points, cells, data = _unit_square_quad_mesh(4)
+    meta = {"space_dim": 2, "indexing": "ij"}
+    pixelated_data = darsia_imread._resample_data(data, points, cells, (8, 8), meta)
+
+    # Cell (i, j) is sampled in voxel (6 - 2j, 2i + 1)
+    i, j = np.meshgrid(np.arange(4), np.arange(4), indexing="ij")
+    filled_voxels = np.column_stack(((6 - 2 * j).ravel(), (2 * i + 1).ravel()))
+    assert np.allclose(pixelated_data[tuple(filled_voxels.T)], data)
+
+    # Any other voxel takes the value of one of its nearest filled voxels
+    for voxel in np.ndindex(8, 8):
+        distances = np.linalg.norm(filled_voxels - np.array(voxel), axis=1)
+        nearest = np.isclose(distances, distances.min())
+        assert np.any(np.isclose(pixelated_data[voxel], data[nearest]))
+
+
+def test_embed_data_preserves_integral():
+    """Test embedding a 1d polyline into 2d, with and without conservative rescaling."""
+
+    points = np.array([[0.0, 0.0], [0.5, 0.25], [1.0, 0.0]])
+    cells = np.array([[0, 1], [1, 2]])
+    data = np.array([1.0, 3.0])
+    meta = {"space_dim": 2, "indexing": "ij"}
+    width = 0.1
+    shape = (10, 40)
+
+    # Conservative embedding preserves the integral over the extruded polyline
+    embedded_data, dimensions, _ = darsia_imread._embed_data(
+        data, points, cells, shape, meta, width
+    )
+    voxel_volume = np.prod(np.array(dimensions) / np.array(shape))
+    lengths = np.linalg.norm(points[cells[:, 1]] - points[cells[:, 0]], axis=1)
+    assert np.isclose(
+        np.sum(embedded_data) * voxel_volume, np.dot(data, lengths) * width
+    )
+
+    # Without rescaling, the contributions of all extruded samples are summed up, also
+    # if they share voxels - each cell is sampled equally often.
+    embedded_data, _, _ = darsia_imread._embed_data(
+        data, points, cells, shape, meta, width, conservative=False
+    )
+    num_samples_per_cell = np.sum(embedded_data) / np.sum(data)
+    assert np.isclose(num_samples_per_cell, np.round(num_samples_per_cell))
+    assert np.sum(embedded_data) > np.max(data) * np.count_nonzero(embedded_data)
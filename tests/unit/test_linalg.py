@@ -0,0 +1,72 @@
+"""Unit tests for the wrappers of Krylov subspace methods."""
+
+import numpy as np
+import pytest
+import scipy.sparse as sps
+
+import darsia
+
+
+def _laplacian_1d(n: int, scaling: np.ndarray) -> sps.csc_matrix:
+    """Symmetrically scaled 1d Laplacian - badly conditioned for large scalings."""
+    laplacian = sps.diags([-1, 2, -1], [-1, 0, 1], shape=(n, n), dtype=float)
+    D = sps.diags(scaling)
+    return (D @ laplacian @ D).tocsc()
+
+
+def test_cg_jacobi_default():
+    """Test that CG uses a lazily assembled Jacobi preconditioner by default."""
+
+    A = _laplacian_1d(20, np.logspace(0, 3, 20))
+    b = np.ones(20)
+    solver = darsia.linalg.CG(A)
+    assert solver.M is None
+
+    x = solver.solve(b, rtol=1e-12, maxiter=1000)
+    assert np.allclose(solver.M.diagonal(), 1.0 / A.diagonal())
+    assert np.allclose(x, sps.linalg.spsolve(A, b))
+
+
+def test_cg_custom_preconditioner():
+    """Test that no Jacobi preconditioner is assembled if one is provided."""
+
+    A = _laplacian_1d(20, np.ones(20))
+    b = np.ones(20)
+    solver = darsia.linalg.CG(A)
+
+    x = solver.solve(b, M=sps.identity(20), rtol=1e-12)
+    assert solver.M is None
+    assert np.allclose(x, sps.linalg.spsolve(A, b))
+
+
+def test_cg_jacobi_zero_diagonal():
+    """Test that zero diagonal entries do not result in infinite scaling."""
+
+    A = sps.csc_matrix(np.array([[0.0, 1.0], [1.0, 2.0]]))
+    solver = darsia.linalg.CG(A)
+    with pytest.warns(UserWarning):
+        solver.setup_jacobi()
+    assert np.allclose(solver.M.diagonal(), [1.0, 0.5])
+
+
+def test_cg_solve_multi():
+    """Test CG for multiple right hand sides against a direct solver."""
+
+    A = _laplacian_1d(20, np.ones(20))
+    B = np.random.rand(20, 3)
+    X = darsia.linalg.CG(A).solve_multi(B, rtol=1e-12)
+    for j in range(3):
+        assert np.allclose(X[:, j], sps.linalg.spsolve(A, B[:, j]))
+
+
+def test_cg_solve_multi_initial_guess():
+    """Test that a provided initial guess is used for the first right hand side."""
+
+    A = _laplacian_1d(20, np.ones(20))
+    B = np.random.rand(20, 1)
+    x = sps.linalg.spsolve(A, B[:, 0])
+
+    # A single iteration does not suffice to solve - unless starting from the solution
+    solver = darsia.linalg.CG(A)
+    assert not np.allclose(solver.solve_multi(B, maxiter=1)[:, 0], x)
+    assert np.allclose(solver.solve_multi(B, x0=x, maxiter=1)[:, 0], x)
@@ -0,0 +1,52 @@
+"""Unit tests for models converting signals to data."""
+
+import numpy as np
+import pytest
+
+import darsia
+
+
+class _ChannelWeighting(darsia.Model):
+    """Model weighting the channels of a signal."""
+
+    def __init__(self, weight: np.ndarray) -> None:
+        self.weight = weight
+
+    def __call__(self, img: np.ndarray) -> np.ndarray:
+        return img @ self.weight if img.ndim > 1 else img * self.weight
+
+
+def _heterogeneous_model(labels: darsia.Image, channels: int):
+    """Heterogeneous model with different weights for the different labels."""
+    model = darsia.HeterogeneousModel(_ChannelWeighting(np.ones(channels)), labels)
+    for i in range(model.masks.size):
+        model[i].weight = np.arange(channels) + i + 1.0
+    return model
+
+
+def _reference_call(model, signal: np.ndarray) -> np.ndarray:
+    """Evaluation of a heterogeneous model using masks."""
+    output = np.zeros(signal.shape[:2])
+    for i, mask in enumerate(model.masks):
+        output[mask.img] = model[i](signal[mask.img])
+    return output
+
+
+@pytest.mark.parametrize("channels", [None, 3])
+def test_heterogeneous_model(channels):
+    """Compare the heterogeneous model with the evaluation using masks."""
+
+    # Non-contiguous labels, scattered over the image
+    rng = np.random.default_rng(0)
+    labels = darsia.Image(rng.choice([3, 7, 11], size=(20, 30)).astype(np.uint8))
+    shape = (20, 30) if channels is None else (20, 30, channels)
+    signal = rng.random(shape)
+
+    model = _heterogeneous_model(labels, 1 if channels is None else channels)
+    output = model(signal)
+    assert output.shape == (20, 30)
+    assert np.allclose(output, _reference_call(model, signal))
+
+    # Replacing the labels updates the grouping of the pixels
+    model.masks.labels = darsia.Image(np.flip(labels.img, axis=0))
+    assert np.allclose(model(signal), _reference_call(model, signal))
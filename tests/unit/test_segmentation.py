@@ -0,0 +1,240 @@
+"""Unit tests for the segmentation utilities."""
+
+import numpy as np
+import pytest
+import skimage
+from scipy import ndimage as ndi
+
+import darsia
+from darsia.utils.segmentation import (
+    _apply_chunkwise,
+    _detect_markers_from_gradient,
+    _dilate_by_size,
+    _dilate_label,
+    _disk,
+    _enhance_contrast,
+    _fast_gradient,
+)
+
+
+def _reference_dilate_by_size(
+    labels: np.ndarray, footprint: int, decreasing_order: bool
+) -> np.ndarray:
+    """Dilation of labels by prescribed size, based on skimage.morphology."""
+    pre_labels = np.unique(labels)
+    sizes = [np.count_nonzero(labels == label) for label in pre_labels]
+    labels_sorted_sizes = np.argsort(sizes)
+    if decreasing_order:
+        labels_sorted_sizes = np.flip(labels_sorted_sizes)
+    for label in labels_sorted_sizes:
+        mask = skimage.morphology.dilation(
+            labels == label, skimage.morphology.disk(footprint)
+        )
+        labels[mask] = label
+    return labels
+
+
+def _two_layer_image(shape=(60, 80), noise=0.02) -> np.ndarray:
+    """Noisy RGB image with two layers, separated at the center column."""
+    rng = np.random.default_rng(0)
+    img = np.full(shape, 0.2)
+    img[:, shape[1] // 2 :] = 0.8
+    img = np.clip(img + noise * rng.standard_normal(img.shape), 0, 1)
+    return np.stack(3 * [img], axis=-1)
+
+
+def _border_labels() -> np.ndarray:
+    """Labeled image with regions of different sizes touching the image border."""
+    labels = np.zeros((40, 50), dtype=np.int32)
+    labels[:5, :7] = 1
+    labels[30:, 40:] = 2
+    labels[15:25, :3] = 3
+    labels[:2, 20:45] = 4
+    labels[18:22, 22:28] = 5
+    return labels
+
+
+@pytest.mark.parametrize("footprint", [1, 3])
+@pytest.mark.parametrize("decreasing_order", [False, True])
+def test_dilate_by_size(footprint, decreasing_order):
+    """Compare the dilation of labels with skimage, for labels touching the border."""
+
+    labels = _border_labels()
+    reference = _reference_dilate_by_size(labels.copy(), footprint, decreasing_order)
+    dilated = _dilate_by_size(labels.copy(), footprint, decreasing_order)
+    assert np.array_equal(dilated, reference)
+
+    # Known labels result in the same dilation
+    dilated = _dilate_by_size(labels.copy(), footprint, decreasing_order, np.arange(6))
+    assert np.array_equal(dilated, reference)
+
+
+def test_dilate_by_size_unknown_labels():
+    """Compare the dilation with skimage for non-consecutive labels, not provided."""
+
+    labels = np.where(_border_labels() > 0, _border_labels() + 3, 0)
+    reference = _reference_dilate_by_size(labels.copy(), 2, True)
+    dilated = _dilate_by_size(labels.copy(), 2, True)
+    assert dilated.shape == labels.shape
+    assert np.array_equal(dilated, reference)
+
+
+def test_dilate_label():
+    """Compare the dilation of a single label with skimage at the image border."""
+
+    labels = _border_labels()
+    reference = labels.copy()
+    reference[skimage.morphology.dilation(labels == 1, _disk(2))] = 1
+
+    _dilate_label(labels, 1, np.argwhere(_disk(2)) - 2)
+    assert np.array_equal(labels, reference)
+
+
+def test_segment_median_square_footprint():
+    """Test the segmentation with a median filter with square footprint."""
+
+    labels = darsia.segment(
+        _two_layer_image(),
+        **{
+            "median disk radius": 3,
+            "median footprint": "square",
+            "markers disk radius": 2,
+            "threshold": 20,
+        },
+    )
+    assert labels.shape == (60, 80)
+    assert np.array_equal(np.unique(labels), [0, 1])
+    assert np.all(labels[:, :38] == labels[0, 0])
+    assert np.all(labels[:, 42:] == labels[0, -1])
+    assert labels[0, 0] != labels[0, -1]
+
+    with pytest.raises(ValueError):
+        darsia.segment(_two_layer_image(), **{"median footprint": "circle"})
+
+
+def test_apply_chunkwise_local_filter():
+    """Test that chunks with sufficient overlap reproduce a local filter exactly."""
+
+    img = _two_layer_image()[:, :, 0]
+    reference = ndi.uniform_filter(img, 5)
+    chunked = _apply_chunkwise(lambda x: ndi.uniform_filter(x, 5), img, 16, 2)
+    assert np.allclose(chunked, reference)
+
+
+def test_segment_tvd_chunks():
+    """Compare chunked and unchunked TVD in the segmentation."""
+
+    # NOTE: For this image, the denoising of single chunks overshoots the range of
+    # the input image.
+    img = _two_layer_image((100, 120), 0.05)
+    basis = skimage.img_as_float32(img[:, :, 0])
+
+    def denoise(x):
+        return skimage.restoration.denoise_tv_bregman(
+            x, weight=0.1, eps=1e-4, max_num_iter=100, isotropic=False
+        )
+
+    # TVD is not local, such that chunking only approximates the denoising
+    reference = denoise(basis)
+    chunked = _apply_chunkwise(denoise, basis, 32, 32)
+    assert np.mean(np.abs(chunked - reference)) < 1e-2
+    assert np.max(np.abs(chunked - reference)) < 1e-1
+
+    kwargs = {"method": "tvd", "markers disk radius": 2, "threshold": 20}
+    labels = darsia.segment(img, **kwargs)
+    chunked_labels = darsia.segment(
+        img, **kwargs, **{"tvd chunk size": 32, "tvd chunk depth": 16}
+    )
+    assert np.array_equal(chunked_labels, labels)
+
+
+@pytest.mark.parametrize("color", [False, True])
+def test_enhance_contrast(color):
+    """Compare the OpenCV based contrast enhancement with skimage."""
+
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 1, 128)
+    img = np.outer(x, x)
+    img = np.clip(0.3 + 0.4 * img + 0.05 * rng.standard_normal(img.shape), 0, 1)
+    if color:
+        img = np.clip(np.stack([img, 0.8 * img, 0.5 * img + 0.2], axis=-1), 0, 1)
+
+    enhanced = _enhance_contrast(img)
+    assert enhanced.dtype == np.uint8
+    assert enhanced.shape == img.shape
+    assert enhanced.min() == 0 and enhanced.max() == 255
+
+    # Float and ubyte input are treated identically
+    assert np.array_equal(enhanced, _enhance_contrast(skimage.img_as_ubyte(img)))
+
+    # The result is not identical but similar to the skimage result
+    reference = skimage.img_as_ubyte(
+        skimage.exposure.equalize_adapthist(skimage.exposure.adjust_log(img, 1))
+    )
+    assert np.corrcoef(enhanced.ravel(), reference.ravel())[0, 1] > 0.95
+    assert np.mean(np.abs(enhanced.astype(int) - reference)) < 16
+
+
+def test_segment_opencv_contrast_enhancement():
+    """Test the segmentation with OpenCV based contrast enhancement."""
+
+    kwargs = {
+        "median disk radius": 3,
+        "median footprint": "square",
+        "markers disk radius": 2,
+        "threshold": 20,
+    }
+    labels = darsia.segment(
+        _two_layer_image(), **kwargs, **{"contrast enhancement": "opencv"}
+    )
+    assert np.array_equal(np.unique(labels), [0, 1])
+    assert np.all(labels[:, :38] == labels[0, 0])
+    assert np.all(labels[:, 42:] == labels[0, -1])
+
+    with pytest.raises(ValueError):
+        darsia.segment(_two_layer_image(), **{"contrast enhancement": "numpy"})
+
+
+@pytest.mark.parametrize("factor", [2, 3])
+def test_detect_markers_downsampling(factor):
+    """Test that markers detected on a downsampled image keep the full shape."""
+
+    # Ubyte image with odd shape, not divisible by the downsampling factors
+    rng = np.random.default_rng(0)
+    img = np.full((61, 83), 50)
+    img[:, 41:] = 200
+    img = (img + rng.integers(-3, 4, img.shape)).astype(np.uint8)
+
+    kwargs = {"markers disk radius": 4, "threshold": 20}
+    reference = _detect_markers_from_gradient(img, False, **kwargs)
+    labels = _detect_markers_from_gradient(
+        img, False, **kwargs, **{"markers downsampling factor": factor}
+    )
+    assert labels.shape == img.shape
+    assert np.array_equal(np.unique(labels), np.unique(reference))
+
+    # Away from the edge between the layers, the markers coincide
+    assert np.array_equal(labels[:, :30], reference[:, :30])
+    assert np.array_equal(labels[:, 52:], reference[:, 52:])
+
+
+@pytest.mark.parametrize("radius", [1, 2, 4])
+def test_fast_gradient(radius):
+    """Compare the fast gradient with the rank based gradient on a step image."""
+
+    img = np.full((40, 50), 50, dtype=np.uint8)
+    img[:, 25:] = 200
+    gradient = _fast_gradient(img, radius)
+    reference = skimage.filters.rank.gradient(img, _disk(radius))
+    assert gradient.dtype == np.uint8
+    assert gradient.shape == img.shape
+
+    # The values differ, but the fast gradient detects the step wherever the rank
+    # based gradient does, with a support extended by the Sobel stencil only
+    support = gradient > 0
+    reference_support = reference > 0
+    assert np.all(support[reference_support])
+    assert not np.any(support[~ndi.binary_dilation(reference_support)])
+
+    # Constant images have vanishing gradients
+    assert not np.any(_fast_gradient(np.full_like(img, 100), radius))